@@ -18,6 +18,10 @@ else:
         RevisionManagementError,
         RegistrationError,
     )
+    from reversion.cache import (  # noqa
+        configure_version_cache,
+        get_version_cache_stats,
+    )
     from reversion.revisions import (  # noqa
         is_active,
         is_manage_manually,
@@ -30,10 +34,15 @@ else:
         add_meta,
         add_to_revision,
         create_revision,
+        configure_write_behind,
+        flush_write_behind,
         register,
         is_registered,
         unregister,
         get_registered_models,
+        get_capture_stats,
     )
 
+default_app_config = "reversion.apps.ReversionConfig"
+
 __version__ = VERSION = (3, 0, 3)
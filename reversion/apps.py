@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.core import serializers
+
+
+class ReversionConfig(AppConfig):
+
+    name = "reversion"
+
+    def ready(self):
+        serializers.register_serializer("reversion", "reversion.serializers")
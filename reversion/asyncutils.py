@@ -0,0 +1,53 @@
+"""Helpers that need Python 3 async syntax, imported only when an async function is used."""
+import asyncio
+from functools import wraps
+from asgiref.sync import sync_to_async
+from reversion.views import _RollBackRevisionView, _set_user_from_request
+
+
+def mark_coroutine_function(obj):
+    try:
+        from asgiref.sync import markcoroutinefunction
+    except ImportError:  # asgiref < 3.6
+        obj._is_coroutine = asyncio.coroutines._is_coroutine
+    else:
+        markcoroutinefunction(obj)
+    return obj
+
+
+def async_revision_decorator(context_wrapper, func):
+    @wraps(func)
+    async def do_revision_context(*args, **kwargs):
+        async with context_wrapper():
+            return await func(*args, **kwargs)
+    return do_revision_context
+
+
+def async_revision_view_decorator(context_wrapper, request_creates_revision, func):
+    @wraps(func)
+    async def do_revision_view(request, *args, **kwargs):
+        if request_creates_revision(request):
+            try:
+                async with context_wrapper():
+                    response = await func(request, *args, **kwargs)
+                    # Check for an error response.
+                    if response.status_code >= 400:
+                        raise _RollBackRevisionView(response)
+                    # Otherwise, we're good. Loading the user can use the database.
+                    await sync_to_async(_set_user_from_request, thread_sensitive=True)(request)
+                    return response
+            except _RollBackRevisionView as ex:
+                return ex.response
+        return await func(request, *args, **kwargs)
+    return do_revision_view
+
+
+def async_dispatch(dispatch):
+    # Async class-based views have a sync dispatch() method that returns a coroutine.
+    @wraps(dispatch)
+    async def do_dispatch(*args, **kwargs):
+        response = dispatch(*args, **kwargs)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+    return do_dispatch
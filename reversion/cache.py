@@ -0,0 +1,87 @@
+from __future__ import unicode_literals
+from collections import namedtuple, OrderedDict
+from threading import Lock
+
+
+_CacheStats = namedtuple("CacheStats", (
+    "hits",
+    "misses",
+    "evictions",
+    "size",
+    "max_size",
+))
+
+
+class _LRUCache(object):
+
+    """
+    A thread-safe cache that evicts the least recently used values once the total size of its values exceeds
+    max_size.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._values = OrderedDict()
+        self._lock = Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value, size = self._values.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            # Move the value to the most recently used end.
+            self._values[key] = value, size
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size):
+        with self._lock:
+            # Values larger than the whole cache would just evict everything else.
+            if size > self.max_size:
+                return
+            if key in self._values:
+                self.size -= self._values.pop(key)[1]
+            self._values[key] = value, size
+            self.size += size
+            while self.size > self.max_size:
+                self.size -= self._values.popitem(last=False)[1][1]
+                self.evictions += 1
+
+    def get_stats(self):
+        with self._lock:
+            return _CacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                size=self.size,
+                max_size=self.max_size,
+            )
+
+
+_version_cache = None
+
+
+def configure_version_cache(max_size=None):
+    """
+    Configures the process-wide cache of deserialized versions, holding up to max_size characters of serialized data.
+
+    Passing None disables the cache.
+    """
+    global _version_cache
+    _version_cache = None if max_size is None else _LRUCache(max_size)
+
+
+def get_version_cache_stats():
+    if _version_cache is None:
+        return None
+    return _version_cache.get_stats()
+
+
+def _get_version_cache():
+    return _version_cache
@@ -0,0 +1,43 @@
+from __future__ import unicode_literals
+import base64
+import zlib
+from django.utils.encoding import force_bytes, force_text
+
+
+class ZlibCodec(object):
+
+    """
+    Compresses serialized data with zlib.
+
+    The compressed data is base64-encoded, so it can be stored in a text column.
+    """
+
+    name = "zlib"
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return force_text(base64.b64encode(zlib.compress(force_bytes(data), self.level)))
+
+    def decompress(self, data):
+        return force_text(zlib.decompress(base64.b64decode(force_bytes(data))))
+
+
+_codecs = {}
+
+
+def register_codec(codec):
+    """
+    Registers a codec for compressing serialized data.
+
+    A codec has a unique ``name``, and ``compress(data)`` and ``decompress(data)`` methods that take and return text.
+    """
+    _codecs[codec.name] = codec
+
+
+def get_codec(name):
+    return _codecs[name]
+
+
+register_codec(ZlibCodec())
@@ -0,0 +1,69 @@
+from __future__ import unicode_literals
+from django.db import reset_queries, transaction, router
+from reversion.models import Revision, Version
+from reversion.revisions import _get_options
+from reversion.management.commands import BaseRevisionCommand
+
+
+class Command(BaseRevisionCommand):
+
+    help = "Compresses the versions of a given app [and model], using the compression they are registered with."
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            "--batch-size",
+            action="store",
+            type=int,
+            default=500,
+            help="For large sets of data, versions will be compressed in batches. Defaults to 500.",
+        )
+
+    def handle(self, *app_labels, **options):
+        verbosity = options["verbosity"]
+        using = options["using"]
+        model_db = options["model_db"]
+        batch_size = options["batch_size"]
+        # Compress versions.
+        using = using or router.db_for_write(Revision)
+        for model in self.get_models(options):
+            codec = _get_options(model).compression
+            if codec is None:
+                continue
+            if verbosity >= 1:
+                self.stdout.write("Compressing versions for {name}".format(
+                    name=model._meta.verbose_name,
+                ))
+            versions = Version.objects.using(using).get_for_model(
+                model,
+                model_db=model_db,
+            ).filter(
+                # Blobs are shared between versions, so versions stored in blobs are left alone.
+                compression="",
+                blob__isnull=True,
+            ).order_by()
+            total = versions.count()
+            compressed_count = 0
+            while True:
+                # Each batch is updated in a separate transaction, so the command can be interrupted and resumed.
+                with transaction.atomic(using=using):
+                    batch = list(versions.only("pk", "serialized_data")[:batch_size])
+                    for version in batch:
+                        Version.objects.using(using).filter(pk=version.pk).update(
+                            serialized_data=codec.compress(version.serialized_data),
+                            compression=codec.name,
+                        )
+                if not batch:
+                    break
+                compressed_count += len(batch)
+                reset_queries()
+                if verbosity >= 2:
+                    self.stdout.write("- Compressed {compressed_count} / {total}".format(
+                        compressed_count=compressed_count,
+                        total=total,
+                    ))
+            # Print out a message, if feeling verbose.
+            if verbosity >= 1:
+                self.stdout.write("- Compressed {total} / {total}".format(
+                    total=total,
+                ))
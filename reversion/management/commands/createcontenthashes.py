@@ -0,0 +1,68 @@
+from __future__ import unicode_literals
+from django.db import reset_queries, transaction, router
+from reversion.models import Revision, Version, _get_content_hash
+from reversion.management.commands import BaseRevisionCommand
+
+
+class Command(BaseRevisionCommand):
+
+    help = "Creates missing content hashes for the versions of a given app [and model]."
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            "--batch-size",
+            action="store",
+            type=int,
+            default=500,
+            help="For large sets of data, hashes will be created in batches. Defaults to 500.",
+        )
+
+    def handle(self, *app_labels, **options):
+        verbosity = options["verbosity"]
+        using = options["using"]
+        model_db = options["model_db"]
+        batch_size = options["batch_size"]
+        # Create hashes.
+        using = using or router.db_for_write(Revision)
+        for model in self.get_models(options):
+            if verbosity >= 1:
+                self.stdout.write("Creating content hashes for {name}".format(
+                    name=model._meta.verbose_name,
+                ))
+            versions = Version.objects.using(using).get_for_model(
+                model,
+                model_db=model_db,
+            ).filter(
+                content_hash__isnull=True,
+            ).order_by()
+            total = versions.count()
+            created_count = 0
+            while True:
+                # Each batch is updated in a separate transaction, so the command can be interrupted and resumed.
+                with transaction.atomic(using=using):
+                    batch = list(versions.select_related("blob", "keyframe__blob").only(
+                        "pk",
+                        "serialized_data",
+                        "compression",
+                        "blob",
+                        "keyframe",
+                    )[:batch_size])
+                    for version in batch:
+                        Version.objects.using(using).filter(pk=version.pk).update(
+                            content_hash=_get_content_hash(version._get_serialized_data()),
+                        )
+                if not batch:
+                    break
+                created_count += len(batch)
+                reset_queries()
+                if verbosity >= 2:
+                    self.stdout.write("- Created {created_count} / {total}".format(
+                        created_count=created_count,
+                        total=total,
+                    ))
+            # Print out a message, if feeling verbose.
+            if verbosity >= 1:
+                self.stdout.write("- Created {total} / {total}".format(
+                    total=total,
+                ))
@@ -5,7 +5,9 @@ import json
 from django.apps import apps
 from django.core.management import CommandError
 from django.db import reset_queries, transaction, router
-from reversion.models import Revision, Version, _safe_subquery
+from reversion.models import (
+    Revision, Version, _can_subquery, _get_object_id_field_name, _iter_join_chunks, _safe_subquery,
+)
 from reversion.management.commands import BaseRevisionCommand
 from reversion.revisions import create_revision, set_comment, add_to_revision, add_meta
 
@@ -62,21 +64,36 @@ class Command(BaseRevisionCommand):
                         name=model._meta.verbose_name,
                     ))
                 created_count = 0
-                live_objs = _safe_subquery(
-                    "exclude",
-                    model._default_manager.using(model_db),
-                    model._meta.pk.name,
-                    Version.objects.using(using).get_for_model(
-                        model,
-                        model_db=model_db,
-                    ),
-                    "object_id",
+                live_objs = model._default_manager.using(model_db)
+                versions = Version.objects.using(using).get_for_model(
+                    model,
+                    model_db=model_db,
                 )
+                object_id_field_name = _get_object_id_field_name(versions, model)
+                if _can_subquery(live_objs, model._meta.pk.name, versions, object_id_field_name):
+                    live_objs = _safe_subquery(
+                        "exclude",
+                        live_objs,
+                        model._meta.pk.name,
+                        versions,
+                        object_id_field_name,
+                    )
+                    ids = list(live_objs.values_list("pk", flat=True).order_by())
+                    total = len(ids)
+                    chunks = (ids[i:i+batch_size] for i in range(0, total, batch_size))
+                else:
+                    # The versions can't be matched in the database, so find the objects without versions in chunks.
+                    chunks = _iter_join_chunks(
+                        "exclude",
+                        live_objs,
+                        model._meta.pk.name,
+                        versions,
+                        object_id_field_name,
+                        chunk_size=batch_size,
+                    )
+                    total = None
                 # Save all the versions.
-                ids = list(live_objs.values_list("pk", flat=True).order_by())
-                total = len(ids)
-                for i in range(0, total, batch_size):
-                    chunked_ids = ids[i:i+batch_size]
+                for chunked_ids in chunks:
                     objects = live_objs.in_bulk(chunked_ids)
                     for obj in objects.values():
                         with create_revision(using=using):
@@ -90,10 +107,10 @@ class Command(BaseRevisionCommand):
                     if verbosity >= 2:
                         self.stdout.write("- Created {created_count} / {total}".format(
                             created_count=created_count,
-                            total=total,
+                            total="?" if total is None else total,
                         ))
                 # Print out a message, if feeling verbose.
                 if verbosity >= 1:
                     self.stdout.write("- Created {total} / {total}".format(
-                        total=total,
+                        total=created_count if total is None else total,
                     ))
@@ -0,0 +1,68 @@
+from __future__ import unicode_literals
+from django.db import models, reset_queries, transaction, router
+from django.db.models.functions import Cast
+from reversion.models import Revision, Version, _has_integer_pk
+from reversion.management.commands import BaseRevisionCommand
+
+
+class Command(BaseRevisionCommand):
+
+    help = "Creates missing integer object ids for the versions of a given app [and model]."
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            "--batch-size",
+            action="store",
+            type=int,
+            default=500,
+            help="For large sets of data, integer object ids will be created in batches. Defaults to 500.",
+        )
+
+    def handle(self, *app_labels, **options):
+        verbosity = options["verbosity"]
+        using = options["using"]
+        model_db = options["model_db"]
+        batch_size = options["batch_size"]
+        # Create integer object ids.
+        using = using or router.db_for_write(Revision)
+        for model in self.get_models(options):
+            # Only models with an integer primary key can have integer object ids.
+            if not _has_integer_pk(model):
+                continue
+            if verbosity >= 1:
+                self.stdout.write("Creating integer object ids for {name}".format(
+                    name=model._meta.verbose_name,
+                ))
+            versions = Version.objects.using(using).get_for_model(
+                model,
+                model_db=model_db,
+            ).filter(
+                object_id_int__isnull=True,
+            ).order_by("pk")
+            total = versions.count()
+            created_count = 0
+            last_pk = None
+            while True:
+                # Each batch is updated in a separate transaction, so the command can be interrupted and resumed.
+                with transaction.atomic(using=using):
+                    batch = versions if last_pk is None else versions.filter(pk__gt=last_pk)
+                    batch_pks = list(batch.values_list("pk", flat=True)[:batch_size])
+                    Version.objects.using(using).filter(pk__in=batch_pks).update(
+                        object_id_int=Cast("object_id", models.BigIntegerField()),
+                    )
+                if not batch_pks:
+                    break
+                last_pk = batch_pks[-1]
+                created_count += len(batch_pks)
+                reset_queries()
+                if verbosity >= 2:
+                    self.stdout.write("- Created {created_count} / {total}".format(
+                        created_count=created_count,
+                        total=total,
+                    ))
+            # Print out a message, if feeling verbose.
+            if verbosity >= 1:
+                self.stdout.write("- Created {total} / {total}".format(
+                    total=total,
+                ))
@@ -0,0 +1,74 @@
+from __future__ import unicode_literals
+from collections import defaultdict
+from django.db import reset_queries, transaction, router
+from reversion.models import Revision, Version, VersionBlob, _get_content_hash
+from reversion.revisions import _get_options, _save_blobs
+from reversion.management.commands import BaseRevisionCommand
+
+
+class Command(BaseRevisionCommand):
+
+    help = "Moves the serialized data of the versions of a given app [and model] into shared blobs."
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            "--batch-size",
+            action="store",
+            type=int,
+            default=500,
+            help="For large sets of data, versions will be converted in batches. Defaults to 500.",
+        )
+
+    def handle(self, *app_labels, **options):
+        verbosity = options["verbosity"]
+        using = options["using"]
+        model_db = options["model_db"]
+        batch_size = options["batch_size"]
+        # Convert versions.
+        using = using or router.db_for_write(Revision)
+        for model in self.get_models(options):
+            if not _get_options(model).blob_storage:
+                continue
+            if verbosity >= 1:
+                self.stdout.write("Creating version blobs for {name}".format(
+                    name=model._meta.verbose_name,
+                ))
+            versions = Version.objects.using(using).get_for_model(
+                model,
+                model_db=model_db,
+            ).filter(
+                blob__isnull=True,
+            ).order_by()
+            total = versions.count()
+            converted_count = 0
+            while True:
+                # Each batch is updated in a separate transaction, so the command can be interrupted and resumed.
+                with transaction.atomic(using=using):
+                    batch = list(versions.only("pk", "serialized_data")[:batch_size])
+                    blob_version_pks = defaultdict(list)
+                    blobs = {}
+                    for version in batch:
+                        blob_hash = _get_content_hash(version.serialized_data)
+                        blob_version_pks[blob_hash].append(version.pk)
+                        blobs[blob_hash] = VersionBlob(content_hash=blob_hash, data=version.serialized_data)
+                    _save_blobs(list(blobs.values()), using)
+                    for blob_hash, version_pks in blob_version_pks.items():
+                        Version.objects.using(using).filter(pk__in=version_pks).update(
+                            blob=blob_hash,
+                            serialized_data="",
+                        )
+                if not batch:
+                    break
+                converted_count += len(batch)
+                reset_queries()
+                if verbosity >= 2:
+                    self.stdout.write("- Created {converted_count} / {total}".format(
+                        converted_count=converted_count,
+                        total=total,
+                    ))
+            # Print out a message, if feeling verbose.
+            if verbosity >= 1:
+                self.stdout.write("- Created {total} / {total}".format(
+                    total=total,
+                ))
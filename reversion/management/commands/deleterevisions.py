@@ -2,7 +2,8 @@ from __future__ import unicode_literals
 from datetime import timedelta
 from django.db import transaction, models, router
 from django.utils import timezone
-from reversion.models import Revision, Version
+from reversion.models import Revision, Version, VersionBlob
+from reversion.revisions import _repair_heads
 from reversion.management.commands import BaseRevisionCommand
 
 
@@ -92,4 +93,20 @@ class Command(BaseRevisionCommand):
                 self.stdout.write("Deleting {total} revisions...".format(
                     total=revisions_to_delete.count(),
                 ))
+            blob_hashes = list(Version.objects.using(using).filter(
+                revision__in=revisions_to_delete,
+                blob__isnull=False,
+            ).order_by().values_list("blob_id", flat=True).distinct().iterator())
             revisions_to_delete.delete()
+            # Point the heads of any objects that lost their latest version at their new latest version.
+            _repair_heads(using)
+            # Delete any blobs that are no longer used.
+            for i in range(0, len(blob_hashes), 500):
+                batch_blob_hashes = blob_hashes[i:i + 500]
+                VersionBlob.objects.using(using).filter(
+                    pk__in=batch_blob_hashes,
+                ).exclude(
+                    pk__in=Version.objects.using(using).filter(
+                        blob__in=batch_blob_hashes,
+                    ).order_by().values_list("blob_id", flat=True),
+                ).delete()
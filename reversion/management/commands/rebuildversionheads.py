@@ -0,0 +1,75 @@
+from __future__ import unicode_literals
+from django.db import models, reset_queries, transaction, router
+from reversion.models import Revision, Version, VersionHead, VersionHeadStatus
+from reversion.revisions import _get_content_type, _get_options
+from reversion.management.commands import BaseRevisionCommand
+
+
+class Command(BaseRevisionCommand):
+
+    help = "Rebuilds the latest version pointers of a given app [and model]."
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            "--batch-size",
+            action="store",
+            type=int,
+            default=500,
+            help="For large sets of data, heads will be created in batches. Defaults to 500.",
+        )
+
+    def handle(self, *app_labels, **options):
+        verbosity = options["verbosity"]
+        using = options["using"]
+        model_db = options["model_db"]
+        batch_size = options["batch_size"]
+        # Rebuild heads.
+        using = using or router.db_for_write(Revision)
+        for model in self.get_models(options):
+            if not _get_options(model).track_heads:
+                continue
+            if verbosity >= 1:
+                self.stdout.write("Rebuilding version heads for {name}".format(
+                    name=model._meta.verbose_name,
+                ))
+            with transaction.atomic(using=using):
+                content_type = _get_content_type(model, using)
+                object_db = model_db or router.db_for_write(model)
+                VersionHead.objects.using(using).filter(
+                    content_type=content_type,
+                    db=object_db,
+                ).delete()
+                latest_version_pks = Version.objects.using(using).get_for_model(
+                    model,
+                    model_db=object_db,
+                ).order_by().values_list("object_id").annotate(
+                    latest_pk=models.Max("pk"),
+                ).values_list("object_id", "latest_pk").iterator()
+                heads = []
+                total = 0
+                for object_id, latest_pk in latest_version_pks:
+                    heads.append(VersionHead(
+                        content_type=content_type,
+                        db=object_db,
+                        object_id=object_id,
+                        version_id=latest_pk,
+                    ))
+                    if len(heads) >= batch_size:
+                        VersionHead.objects.using(using).bulk_create(heads)
+                        total += len(heads)
+                        heads = []
+                        reset_queries()
+                        if verbosity >= 2:
+                            self.stdout.write("- Created {total}".format(
+                                total=total,
+                            ))
+                VersionHead.objects.using(using).bulk_create(heads)
+                total += len(heads)
+                # Let get_deleted() use the heads.
+                VersionHeadStatus.objects.using(using).get_or_create(content_type=content_type, db=object_db)
+            # Print out a message, if feeling verbose.
+            if verbosity >= 1:
+                self.stdout.write("- Created {total} / {total}".format(
+                    total=total,
+                ))
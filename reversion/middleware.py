@@ -1,5 +1,5 @@
 import sys
-from reversion.revisions import create_revision as create_revision_base
+from reversion.revisions import create_revision as create_revision_base, iscoroutinefunction
 from reversion.views import _request_creates_revision, _set_user_from_request, create_revision
 
 
@@ -7,12 +7,20 @@ class RevisionMiddleware(object):
 
     """Wraps the entire request in a revision."""
 
+    sync_capable = True
+
+    async_capable = True
+
     manage_manually = False
 
     using = None
 
     atomic = True
 
+    defer_serialization = False
+
+    write_behind = False
+
     def __init__(self, get_response=None):
         super(RevisionMiddleware, self).__init__()
         # Support Django 1.10 middleware.
@@ -21,8 +29,14 @@ class RevisionMiddleware(object):
                 manage_manually=self.manage_manually,
                 using=self.using,
                 atomic=self.atomic,
-                request_creates_revision=self.request_creates_revision
+                request_creates_revision=self.request_creates_revision,
+                defer_serialization=self.defer_serialization,
+                write_behind=self.write_behind,
             )(get_response)
+            # Support Django 3.1 async middleware.
+            if iscoroutinefunction(get_response):
+                from reversion.asyncutils import mark_coroutine_function
+                mark_coroutine_function(self)
 
     def request_creates_revision(self, request):
         return _request_creates_revision(request)
@@ -32,7 +46,9 @@ class RevisionMiddleware(object):
             context = create_revision_base(
                 manage_manually=self.manage_manually,
                 using=self.using,
-                atomic=self.atomic
+                atomic=self.atomic,
+                defer_serialization=self.defer_serialization,
+                write_behind=self.write_behind,
             )
             context.__enter__()
             if not hasattr(request, "_revision_middleware"):
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.2.28 on 2026-10-16 20:27
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reversion', '0001_squashed_0004_auto_20160611_1202'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='A hash of the serialized data, used to detect changes between versions.', max_length=40, null=True),
+        ),
+    ]
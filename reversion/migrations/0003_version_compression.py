@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.2.28 on 2026-10-16 20:41
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reversion', '0002_version_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='compression',
+            field=models.CharField(blank=True, default='', help_text='The codec used to compress the serialized data, if any.', max_length=32),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.2.28 on 2026-10-16 20:43
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import reversion.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reversion', '0003_version_compression'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='keyframe',
+            field=models.ForeignKey(blank=True, help_text="The version this version's serialized data is a delta against, if any.", null=True, on_delete=reversion.models._materialize_deltas, related_name='+', to='reversion.Version'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.2.28 on 2026-10-16 20:44
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reversion', '0004_version_keyframe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionBlob',
+            fields=[
+                ('content_hash', models.CharField(help_text='A hash of the data.', max_length=40, primary_key=True, serialize=False)),
+                ('data', models.TextField(help_text='The serialized data, in the form stored by the version.')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='blob',
+            field=models.ForeignKey(blank=True, help_text='The shared blob holding the serialized data, if any.', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='reversion.VersionBlob'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.2.28 on 2026-10-16 20:45
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reversion', '0005_versionblob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='version',
+            index=models.Index(fields=['content_type', 'db', 'object_id', 'id'], name='reversion_version_object_idx'),
+        ),
+    ]
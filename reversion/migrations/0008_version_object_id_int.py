@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.2.28 on 2026-10-16 20:52
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reversion', '0007_versionhead'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='object_id_int',
+            field=models.BigIntegerField(blank=True, help_text='Primary key of the model under version control, if it is an integer.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='version',
+            index=models.Index(fields=['content_type', 'db', 'object_id_int'], name='reversion_version_int_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.2.28 on 2026-10-16 22:47
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('reversion', '0008_version_object_id_int'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionHeadStatus',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('db', models.CharField(help_text='The database the model under version control is stored in.', max_length=191)),
+                ('content_type', models.ForeignKey(help_text='Content type of the model under version control.', on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+            ],
+            options={
+                'unique_together': {('content_type', 'db')},
+            },
+        ),
+    ]
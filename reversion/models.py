@@ -1,21 +1,84 @@
 from __future__ import unicode_literals
-from collections import defaultdict
-from itertools import chain, groupby
+import copy
+import hashlib
+import json
+from collections import defaultdict, OrderedDict
+from itertools import groupby
+import django
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.conf import settings
 from django.contrib.admin.models import LogEntry
 from django.core import serializers
 from django.core.serializers.base import DeserializationError
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import EmptyResultSet, ObjectDoesNotExist, ValidationError
 from django.db import models, IntegrityError, transaction, router, connections
 from django.db.models.deletion import Collector
+from django.db.models.base import ModelState
 from django.db.models.expressions import RawSQL
+from django.db.models.lookups import In
+from django.db.models.query import ModelIterable, prefetch_related_objects
+from django.db.models.sql.where import AND
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _, ugettext
-from django.utils.encoding import force_text, python_2_unicode_compatible
+from django.utils.encoding import force_bytes, force_text
+try:
+    from django.utils.encoding import python_2_unicode_compatible
+except ImportError:  # Django >= 3.0, which only supports Python 3
+    def python_2_unicode_compatible(cls):
+        return cls
+try:
+    from django.db.models import UniqueConstraint
+except ImportError:  # Django < 2.2
+    UniqueConstraint = ()
+from reversion.cache import _get_version_cache
+from reversion.compression import get_codec
 from reversion.errors import RevertError
-from reversion.revisions import _get_options, _get_content_type, _follow_relations_recursive
+from reversion.revisions import (
+    _BULK_CREATE_BATCH_SIZE, _get_bulk_create_batch_size, _get_plan, _get_options, _get_content_type,
+    _follow_relations_recursive,
+)
+
+
+def _sort_models(models):
+    """
+    Returns the given models ordered so each model comes after the models its foreign keys point to. Models in
+    dependency cycles come last, in their original order.
+    """
+    concrete_models = {model._meta.concrete_model for model in models}
+    dependencies = {
+        model: {
+            field.remote_field.model._meta.concrete_model
+            for field
+            in model._meta.concrete_model._meta.local_concrete_fields
+            if field.remote_field is not None
+        } & concrete_models - {model._meta.concrete_model}
+        for model
+        in models
+    }
+    sorted_models = []
+    sorted_concrete_models = set()
+    while models:
+        ready_models = [model for model in models if dependencies[model] <= sorted_concrete_models]
+        if not ready_models:
+            break
+        sorted_models.extend(ready_models)
+        sorted_concrete_models.update(model._meta.concrete_model for model in ready_models)
+        models = [model for model in models if model not in ready_models]
+    return sorted_models + models
+
+
+def _sort_versions(versions):
+    """
+    Returns the given versions ordered so each version comes after the versions of the models its foreign keys point
+    to, so they can be reverted in one pass.
+    """
+    model_order = {
+        model: index
+        for index, model
+        in enumerate(_sort_models(list(OrderedDict.fromkeys(version._model for version in versions))))
+    }
+    return sorted(versions, key=lambda version: model_order[version._model])
 
 
 def _safe_revert(versions):
@@ -34,6 +97,151 @@ def _safe_revert(versions):
         _safe_revert(unreverted_versions)
 
 
+def _can_upsert(connection):
+    return connection.vendor in ("postgresql", "mysql") or (
+        connection.vendor == "sqlite" and connection.Database.sqlite_version_info >= (3, 24, 0)
+    )
+
+
+def _has_unique_constraints(model):
+    """Returns whether the table of the model has unique constraints other than the primary key."""
+    opts = model._meta.concrete_model._meta
+    return bool(
+        opts.unique_together or
+        any(field.unique and not field.primary_key for field in opts.local_concrete_fields) or
+        any(isinstance(constraint, UniqueConstraint) for constraint in getattr(opts, "constraints", ()))
+    )
+
+
+def _get_upsert_sql(connection, pk_column, columns):
+    """
+    Returns the SQL to append to an INSERT to update rows with the same primary key instead.
+    """
+    qn = connection.ops.quote_name
+    update_columns = [column for column in columns if column != pk_column]
+    if connection.vendor == "mysql":
+        return "ON DUPLICATE KEY UPDATE {updates}".format(
+            updates=", ".join(
+                "{column} = VALUES({column})".format(column=qn(column))
+                for column
+                in update_columns or [pk_column]
+            ),
+        )
+    if not update_columns:
+        return "ON CONFLICT ({pk}) DO NOTHING".format(pk=qn(pk_column))
+    return "ON CONFLICT ({pk}) DO UPDATE SET {updates}".format(
+        pk=qn(pk_column),
+        updates=", ".join(
+            "{column} = EXCLUDED.{column}".format(column=qn(column))
+            for column
+            in update_columns
+        ),
+    )
+
+
+def _bulk_revert_model(model, object_versions, using):
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    # Upsert the rows of the model's own table, like a raw save. Proxy models use the table of their concrete model.
+    model = model._meta.concrete_model
+    fields = model._meta.local_concrete_fields
+    upsert_sql = _get_upsert_sql(connection, model._meta.pk.column, [field.column for field in fields])
+    objs = [object_version.object for object_version in object_versions]
+    batch_size = max(1, min(_BULK_CREATE_BATCH_SIZE, connection.ops.bulk_batch_size(fields, objs)))
+    with connection.cursor() as cursor:
+        for i in range(0, len(objs), batch_size):
+            batch_objs = objs[i:i + batch_size]
+            cursor.execute(
+                "INSERT INTO {table} ({columns}) VALUES {values} {upsert_sql}".format(
+                    table=qn(model._meta.db_table),
+                    columns=", ".join(qn(field.column) for field in fields),
+                    values=", ".join(["({})".format(", ".join(["%s"] * len(fields)))] * len(batch_objs)),
+                    upsert_sql=upsert_sql,
+                ),
+                [
+                    field.get_db_prep_save(getattr(obj, field.attname), connection=connection)
+                    for obj in batch_objs
+                    for field in fields
+                ],
+            )
+    # Replace the M2M relations stored in the versions.
+    for field in model._meta.many_to_many:
+        m2m_object_versions = [
+            object_version
+            for object_version
+            in object_versions
+            if object_version.m2m_data and field.name in object_version.m2m_data
+        ]
+        if not m2m_object_versions:
+            continue
+        through = field.remote_field.through
+        source_attname = through._meta.get_field(field.m2m_field_name()).attname
+        target_attname = through._meta.get_field(field.m2m_reverse_field_name()).attname
+        # Symmetrical relations store a row in each direction, like RelatedManager.set().
+        symmetrical = field.remote_field.symmetrical
+        batch_size = _get_batch_size(_BULK_CREATE_BATCH_SIZE, using)
+        if symmetrical:
+            batch_size = max(1, batch_size // 2)
+        for i in range(0, len(m2m_object_versions), batch_size):
+            batch_object_versions = m2m_object_versions[i:i + batch_size]
+            batch_pks = [object_version.object.pk for object_version in batch_object_versions]
+            links = models.Q(**{"{}__in".format(source_attname): batch_pks})
+            if symmetrical:
+                links |= models.Q(**{"{}__in".format(target_attname): batch_pks})
+            through._base_manager.using(using).filter(links).delete()
+            rows = OrderedDict()
+            for object_version in batch_object_versions:
+                for target_pk in object_version.m2m_data[field.name]:
+                    rows[(object_version.object.pk, target_pk)] = None
+                    if symmetrical:
+                        rows[(target_pk, object_version.object.pk)] = None
+            objs = [
+                through(**{
+                    source_attname: source_pk,
+                    target_attname: target_pk,
+                })
+                for source_pk, target_pk in rows
+            ]
+            through._base_manager.using(using).bulk_create(
+                objs,
+                batch_size=_get_bulk_create_batch_size(through, objs, using),
+            )
+
+
+def _bulk_revert(versions, using):
+    """
+    Restores the serialized model instances of the given versions with one upsert per model and batch of versions,
+    rather than one save() per version. No model signals are sent. Returns False if the database doesn't support
+    upserts.
+    """
+    connection = connections[using]
+    if not _can_upsert(connection):
+        return False
+    # MySQL upserts on any unique key, which could overwrite a different row, so only the primary key can be unique.
+    if connection.vendor == "mysql" and any(_has_unique_constraints(version._model) for version in versions):
+        return False
+    # Group the versions by model in dependency order, retrying models that can't be saved until their dependencies
+    # have been saved.
+    model_versions = OrderedDict()
+    for version in _sort_versions(versions):
+        model_versions.setdefault(version._model, []).append(version)
+    model_versions = list(model_versions.items())
+    while model_versions:
+        unreverted_model_versions = []
+        for model, versions in model_versions:
+            try:
+                with transaction.atomic(using=using):
+                    _bulk_revert_model(model, [version._object_version for version in versions], using)
+            except IntegrityError:
+                unreverted_model_versions.append((model, versions))
+        if len(unreverted_model_versions) == len(model_versions):
+            raise RevertError(ugettext("Could not save %(object_repr)s version - missing dependency.") % {
+                "object_repr": unreverted_model_versions[0][1][0],
+            })
+        model_versions = unreverted_model_versions
+    return True
+
+
 @python_2_unicode_compatible
 class Revision(models.Model):
 
@@ -63,7 +271,7 @@ class Revision(models.Model):
     def get_comment(self):
         return LogEntry(change_message=self.comment).get_change_message()
 
-    def revert(self, delete=False):
+    def revert(self, delete=False, bulk=False):
         # Group the models by the database of the serialized model.
         versions_by_db = defaultdict(list)
         for version in self.version_set.iterator():
@@ -83,10 +291,7 @@ class Revision(models.Model):
                         except model.DoesNotExist:
                             pass
                     # Calculate the set of all objects that are in the revision now.
-                    current_revision = chain.from_iterable(
-                        _follow_relations_recursive(obj)
-                        for obj in old_revision
-                    )
+                    current_revision = _follow_relations_recursive(old_revision)
                     # Delete objects that are no longer in the current revision.
                     collector = Collector(using=version_db)
                     new_objs = [item for item in current_revision
@@ -94,8 +299,10 @@ class Revision(models.Model):
                     for model, group in groupby(new_objs, type):
                         collector.collect(list(group))
                     collector.delete()
-                # Attempt to revert all revisions.
-                _safe_revert(versions)
+                # Revert all versions in dependency order. Versions that still fail, e.g. because of dependency
+                # cycles, are retried.
+                if not bulk or not _bulk_revert(versions, version_db):
+                    _safe_revert(_sort_versions(versions))
 
     def __str__(self):
         return ", ".join(force_text(version) for version in self.version_set.all())
@@ -108,11 +315,37 @@ class Revision(models.Model):
 class SubquerySQL(RawSQL):
 
     def as_sql(self, compiler, connection):
+        # Django >= 3.0 no longer adds parentheses around the right hand side of a lookup.
+        if django.VERSION >= (3, 0):
+            return "({})".format(self.sql), self.params
         return self.sql, self.params
 
 
 class VersionQuerySet(models.QuerySet):
 
+    def __init__(self, *args, **kwargs):
+        super(VersionQuerySet, self).__init__(*args, **kwargs)
+        self._prefetch_field_dicts = False
+
+    def _clone(self, *args, **kwargs):
+        clone = super(VersionQuerySet, self)._clone(*args, **kwargs)
+        clone._prefetch_field_dicts = self._prefetch_field_dicts
+        return clone
+
+    def _fetch_all(self):
+        super(VersionQuerySet, self)._fetch_all()
+        if self._prefetch_field_dicts and self._iterable_class is ModelIterable:
+            _prefetch_field_dicts(self._result_cache)
+
+    def prefetch_field_dicts(self):
+        """
+        Fills in the field_dict of the versions when the queryset is evaluated, loading the parent versions of
+        inherited models in bulk.
+        """
+        clone = self._clone()
+        clone._prefetch_field_dicts = True
+        return clone
+
     def get_for_model(self, model, model_db=None):
         model_db = model_db or router.db_for_write(model)
         content_type = _get_content_type(model, self.db)
@@ -130,16 +363,42 @@ class VersionQuerySet(models.QuerySet):
         return self.get_for_object_reference(obj.__class__, obj.pk, model_db=model_db)
 
     def get_deleted(self, model, model_db=None):
-        # Try to do a faster JOIN.
         model_db = model_db or router.db_for_write(model)
+        # Use the latest version pointers, if they are maintained and up to date. Objects versioned before track_heads
+        # was enabled have no heads until rebuildversionheads is run.
+        if _get_options(model).track_heads:
+            content_type = _get_content_type(model, self.db)
+            heads = VersionHead.objects.using(self.db).filter(
+                content_type=content_type,
+                db=model_db,
+            )
+            if (
+                VersionHeadStatus.objects.using(self.db).filter(content_type=content_type, db=model_db).exists() and
+                not heads.filter(version__isnull=True).exists()
+            ):
+                return self._get_deleted_heads(model, model_db, heads)
+        # Try to do a faster JOIN.
         connection = connections[self.db]
-        if self.db == model_db and connection.vendor in ("sqlite", "postgresql", "oracle"):
+        versions = self.get_for_model(model, model_db=model_db)
+        object_id_field_name = _get_object_id_field_name(versions, model)
+        if self.db != model_db:
+            join_sql = None
+        elif object_id_field_name == "object_id_int":
+            # Join the integer columns directly, so the database can use the primary key index of the model.
+            join_sql = "{model}.{model_id} = V.{object_id_int}".format(
+                model=connection.ops.quote_name(model._meta.db_table),
+                model_id=connection.ops.quote_name(model._meta.pk.column),
+                object_id_int=connection.ops.quote_name("object_id_int"),
+            )
+        else:
+            join_sql = _get_object_id_join_sql(connection, model, "V")
+        if join_sql is not None:
             content_type = _get_content_type(model, self.db)
             subquery = SubquerySQL(
                 """
                 SELECT MAX(V.{id})
                 FROM {version} V
-                LEFT JOIN {model} ON V.{object_id} = CAST({model}.{model_id} as {str})
+                LEFT JOIN {model} ON {join_sql}
                 WHERE
                     V.{db} = %s AND
                     V.{content_type_id} = %s AND
@@ -149,9 +408,9 @@ class VersionQuerySet(models.QuerySet):
                     id=connection.ops.quote_name("id"),
                     version=connection.ops.quote_name(Version._meta.db_table),
                     model=connection.ops.quote_name(model._meta.db_table),
-                    model_id=connection.ops.quote_name(model._meta.pk.db_column or model._meta.pk.attname),
-                    object_id=connection.ops.quote_name("object_id"),
-                    str=Version._meta.get_field("object_id").db_type(connection),
+                    model_id=connection.ops.quote_name(model._meta.pk.column),
+                    join_sql=join_sql,
+                    object_id=connection.ops.quote_name(object_id_field_name),
                     db=connection.ops.quote_name("db"),
                     content_type_id=connection.ops.quote_name("content_type_id"),
                 ),
@@ -159,26 +418,204 @@ class VersionQuerySet(models.QuerySet):
                 output_field=Version._meta.pk,
             )
         else:
-            # We have to use a slow subquery.
-            subquery = self.get_for_model(model, model_db=model_db).exclude(
-                object_id__in=list(
-                    model._default_manager.using(model_db).values_list("pk", flat=True).order_by().iterator()
-                ),
-            ).values_list("object_id").annotate(
-                latest_pk=models.Max("pk")
-            ).order_by().values_list("latest_pk", flat=True)
+            live_objs = model._default_manager.using(model_db)
+            if _can_subquery(versions, object_id_field_name, live_objs, model._meta.pk.name):
+                subquery = _safe_subquery(
+                    "exclude",
+                    versions,
+                    object_id_field_name,
+                    live_objs,
+                    model._meta.pk.name,
+                ).values_list(object_id_field_name).annotate(
+                    latest_pk=models.Max("pk")
+                ).order_by().values_list("latest_pk", flat=True)
+            else:
+                # We have to find the deleted objects in chunks.
+                return _filter_pks(self, (
+                    latest_pk
+                    for object_ids
+                    in _iter_join_chunks(
+                        "exclude",
+                        versions,
+                        object_id_field_name,
+                        live_objs,
+                        model._meta.pk.name,
+                    )
+                    for latest_pk
+                    in versions.filter(**{
+                        "{}__in".format(object_id_field_name): object_ids,
+                    }).values_list(object_id_field_name).annotate(
+                        latest_pk=models.Max("pk")
+                    ).order_by().values_list("latest_pk", flat=True)
+                ))
         # Perform the subquery.
         return self.filter(
             pk__in=subquery,
         )
 
+    def _get_deleted_heads(self, model, model_db, heads):
+        connection = connections[self.db]
+        join_sql = _get_object_id_join_sql(connection, model, "H") if self.db == model_db else None
+        if join_sql is not None:
+            subquery = SubquerySQL(
+                """
+                SELECT H.{version_id}
+                FROM {head} H
+                LEFT JOIN {model} ON {join_sql}
+                WHERE
+                    H.{db} = %s AND
+                    H.{content_type_id} = %s AND
+                    {model}.{model_id} IS NULL
+                """.format(
+                    version_id=connection.ops.quote_name("version_id"),
+                    head=connection.ops.quote_name(VersionHead._meta.db_table),
+                    model=connection.ops.quote_name(model._meta.db_table),
+                    model_id=connection.ops.quote_name(model._meta.pk.column),
+                    join_sql=join_sql,
+                    db=connection.ops.quote_name("db"),
+                    content_type_id=connection.ops.quote_name("content_type_id"),
+                ),
+                (model_db, _get_content_type(model, self.db).id),
+                output_field=Version._meta.pk,
+            )
+        else:
+            live_objs = model._default_manager.using(model_db)
+            if _can_subquery(heads, "object_id", live_objs, model._meta.pk.name):
+                subquery = _safe_subquery(
+                    "exclude",
+                    heads,
+                    "object_id",
+                    live_objs,
+                    model._meta.pk.name,
+                ).order_by().values_list("version_id", flat=True)
+            else:
+                # We have to find the deleted objects in chunks.
+                return _filter_pks(self, (
+                    version_id
+                    for object_ids
+                    in _iter_join_chunks(
+                        "exclude",
+                        heads,
+                        "object_id",
+                        live_objs,
+                        model._meta.pk.name,
+                    )
+                    for version_id
+                    in heads.filter(
+                        object_id__in=object_ids,
+                    ).order_by().values_list("version_id", flat=True)
+                ))
+        return self.filter(
+            pk__in=subquery,
+        )
+
     def get_unique(self):
-        last_key = None
+        # Compare content hashes in the database, if possible.
+        connection = connections[self.db]
+        if (
+            getattr(connection.features, "supports_over_clause", False) and
+            self.query.can_filter() and
+            not self.filter(content_hash__isnull=True).exists()
+        ):
+            order_by = self._get_window_order_by()
+            if order_by is not None:
+                return iter(self._get_unique_window(order_by))
+        # We have to deserialize the versions to compare them.
+        return self._get_unique_iterator()
+
+    def _get_window_order_by(self):
+        # Returns the ordering of the queryset as expressions, or None if it can't be used in a window.
+        if self.query.order_by:
+            ordering = self.query.order_by
+        elif self.query.default_ordering and self.model._meta.ordering:
+            ordering = self.model._meta.ordering
+        else:
+            ordering = ("-pk",)
+        order_by = []
+        for field in ordering:
+            if hasattr(field, "resolve_expression"):
+                order_by.append(field)
+            elif field == "?":
+                return None
+            elif field.startswith("-"):
+                order_by.append(models.F(field[1:]).desc())
+            else:
+                order_by.append(models.F(field).asc())
+        return order_by
+
+    def _get_unique_window(self, order_by):
+        from django.db.models import Window
+        from django.db.models.functions import Lag
+        connection = connections[self.db]
+        # Compare each version with the previous version of the same object, in the order of the queryset.
+        window_query = self.order_by().annotate(
+            version_id=models.F("pk"),
+            version_content_hash=models.F("content_hash"),
+            previous_content_hash=Window(
+                expression=Lag("content_hash"),
+                partition_by=[models.F("content_type_id"), models.F("db"), models.F("object_id")],
+                order_by=order_by,
+            ),
+        ).values_list("version_id", "version_content_hash", "previous_content_hash")
+        sql, params = window_query.query.get_compiler(using=self.db).as_sql()
+        subquery = SubquerySQL(
+            """
+            SELECT V.{version_id}
+            FROM ({window_sql}) V
+            WHERE
+                V.{previous_content_hash} IS NULL OR
+                V.{previous_content_hash} <> V.{version_content_hash}
+            """.format(
+                window_sql=sql,
+                version_id=connection.ops.quote_name("version_id"),
+                version_content_hash=connection.ops.quote_name("version_content_hash"),
+                previous_content_hash=connection.ops.quote_name("previous_content_hash"),
+            ),
+            params,
+            output_field=Version._meta.pk,
+        )
+        return self.filter(
+            pk__in=subquery,
+        )
+
+    def _get_unique_iterator(self):
+        last_version = None
         for version in self.iterator():
-            key = (version.object_id, version.content_type_id, version.db, version._local_field_dict)
-            if last_key != key:
+            if last_version is None or not version._is_duplicate_of(last_version):
                 yield version
-            last_key = key
+            last_version = version
+
+
+class VersionBlob(models.Model):
+
+    """Serialized data shared by all versions with the same serialized data."""
+
+    content_hash = models.CharField(
+        max_length=40,
+        primary_key=True,
+        help_text="A hash of the data.",
+    )
+
+    data = models.TextField(
+        help_text="The serialized data, in the form stored by the version.",
+    )
+
+    class Meta:
+        app_label = 'reversion'
+
+
+def _materialize_deltas(collector, field, sub_objs, using):
+    # Store deltas as full versions before their keyframe is deleted.
+    sub_objs = list(sub_objs)
+    prefetch_related_objects(sub_objs, "keyframe", "blob")
+    serialized_data_field = Version._meta.get_field("serialized_data")
+    for version in sub_objs:
+        data = version._get_serialized_data()
+        if version.compression:
+            data = get_codec(version.compression).compress(data)
+        collector.add_field_update(serialized_data_field, data, [version])
+    collector.add_field_update(Version._meta.get_field("blob"), None, sub_objs)
+    collector.add_field_update(field, None, sub_objs)
 
 
 @python_2_unicode_compatible
@@ -199,6 +636,12 @@ class Version(models.Model):
         help_text="Primary key of the model under version control.",
     )
 
+    object_id_int = models.BigIntegerField(
+        blank=True,
+        null=True,
+        help_text="Primary key of the model under version control, if it is an integer.",
+    )
+
     content_type = models.ForeignKey(
         ContentType,
         on_delete=models.CASCADE,
@@ -233,13 +676,66 @@ class Version(models.Model):
         help_text="The serialized form of this version of the model.",
     )
 
+    compression = models.CharField(
+        max_length=32,
+        blank=True,
+        default="",
+        help_text="The codec used to compress the serialized data, if any.",
+    )
+
+    blob = models.ForeignKey(
+        VersionBlob,
+        blank=True,
+        null=True,
+        on_delete=models.PROTECT,
+        related_name="+",
+        help_text="The shared blob holding the serialized data, if any.",
+    )
+
+    keyframe = models.ForeignKey(
+        "self",
+        blank=True,
+        null=True,
+        on_delete=_materialize_deltas,
+        related_name="+",
+        help_text="The version this version's serialized data is a delta against, if any.",
+    )
+
     object_repr = models.TextField(
         help_text="A string representation of the object.",
     )
 
-    @cached_property
-    def _object_version(self):
-        data = self.serialized_data
+    content_hash = models.CharField(
+        max_length=40,
+        blank=True,
+        null=True,
+        db_index=True,
+        help_text="A hash of the serialized data, used to detect changes between versions.",
+    )
+
+    def _get_serialized_data(self):
+        data = self.serialized_data if self.blob_id is None else self.blob.data
+        if self.compression:
+            try:
+                codec = get_codec(self.compression)
+            except KeyError:
+                raise RevertError(ugettext(
+                    "Could not load %(object_repr)s version - unknown compression %(compression)s."
+                ) % {
+                    "object_repr": self.object_repr,
+                    "compression": self.compression,
+                })
+            try:
+                data = codec.decompress(data)
+            except Exception:
+                raise RevertError(ugettext("Could not load %(object_repr)s version - incompatible version data.") % {
+                    "object_repr": self.object_repr,
+                })
+        if self.keyframe_id is not None:
+            data = _apply_delta(self.keyframe._get_serialized_data(), data)
+        return data
+
+    def _deserialize(self, data):
         data = force_text(data.encode("utf8"))
         try:
             return list(serializers.deserialize(self.format, data, ignorenonexistent=True))[0]
@@ -253,6 +749,46 @@ class Version(models.Model):
                 "format": self.format,
             })
 
+    @cached_property
+    def _cache_entry(self):
+        """
+        A [object_version, local_field_dict] list for this version, with the local field dict filled in on first use.
+
+        If the version cache is enabled, the list is shared with other instances of the same version, and must not be
+        modified except to fill in the local field dict.
+        """
+        cache = _get_version_cache()
+        # Primary keys can be reused after versions are deleted, so only versions with a content hash are cached.
+        if cache is None or self.pk is None or not self.content_hash:
+            return [self._deserialize(self._get_serialized_data()), None]
+        cache_key = (self._state.db, self.pk, self.format, self.content_hash)
+        entry = cache.get(cache_key)
+        if entry is None:
+            data = self._get_serialized_data()
+            entry = [self._deserialize(data), None]
+            cache.set(cache_key, entry, len(data))
+        return entry
+
+    @cached_property
+    def _object_version(self):
+        object_version = self._cache_entry[0]
+        if _get_version_cache() is None:
+            return object_version
+        # Copy the cached object, so saving it doesn't change the cache.
+        obj = copy.copy(object_version.object)
+        obj._state = ModelState()
+        obj._state.db = object_version.object._state.db
+        obj._state.adding = object_version.object._state.adding
+        object_version = copy.copy(object_version)
+        object_version.object = obj
+        if object_version.m2m_data:
+            object_version.m2m_data = {
+                attname: list(values)
+                for attname, values
+                in object_version.m2m_data.items()
+            }
+        return object_version
+
     @cached_property
     def _local_field_dict(self):
         """
@@ -261,20 +797,42 @@ class Version(models.Model):
 
         Parent links of inherited multi-table models will not be followed.
         """
-        version_options = _get_options(self._model)
-        object_version = self._object_version
-        obj = object_version.object
-        model = self._model
-        field_dict = {}
-        for field_name in version_options.fields:
-            field = model._meta.get_field(field_name)
-            if isinstance(field, models.ManyToManyField):
-                # M2M fields with a custom through are not stored in m2m_data, but as a separate model.
-                if object_version.m2m_data and field.attname in object_version.m2m_data:
-                    field_dict[field.attname] = object_version.m2m_data[field.attname]
-            else:
-                field_dict[field.attname] = getattr(obj, field.attname)
-        return field_dict
+        entry = self._cache_entry
+        if entry[1] is None:
+            plan = _get_plan(self._model)
+            object_version = entry[0]
+            obj = object_version.object
+            field_dict = {
+                attname: getattr(obj, attname)
+                for attname
+                in plan.attnames
+            }
+            # M2M fields with a custom through are not stored in m2m_data, but as a separate model.
+            if object_version.m2m_data:
+                for attname in plan.m2m_attnames:
+                    if attname in object_version.m2m_data:
+                        field_dict[attname] = object_version.m2m_data[attname]
+            entry[1] = field_dict
+        # Copy the field dict, so changing it doesn't change the cache.
+        return {
+            attname: list(value) if isinstance(value, list) else value
+            for attname, value
+            in entry[1].items()
+        }
+
+    def _is_duplicate_of(self, version):
+        """
+        Returns whether this version stores the same data as the given version
+        for the same model instance.
+
+        Content hashes are compared if both versions have them, avoiding
+        deserialization of the versions.
+        """
+        if (self.object_id, self.content_type_id, self.db) != (version.object_id, version.content_type_id, version.db):
+            return False
+        if self.content_hash and version.content_hash and self.format == version.format:
+            return self.content_hash == version.content_hash
+        return self._local_field_dict == version._local_field_dict
 
     @cached_property
     def field_dict(self):
@@ -286,7 +844,7 @@ class Version(models.Model):
         """
         field_dict = self._local_field_dict
         # Add parent data.
-        for parent_model, field in self._model._meta.concrete_model._meta.parents.items():
+        for parent_model, field in _get_plan(self._model).parents:
             content_type = _get_content_type(parent_model, self._state.db)
             parent_id = field_dict[field.attname]
             parent_version = self.revision.version_set.get(
@@ -308,9 +866,244 @@ class Version(models.Model):
         unique_together = (
             ("db", "content_type", "object_id", "revision"),
         )
+        indexes = (
+            # Covers the history of an object, newest first.
+            models.Index(
+                fields=["content_type", "db", "object_id", "id"],
+                name="reversion_version_object_idx",
+            ),
+            # Covers joins with integer primary keys.
+            models.Index(
+                fields=["content_type", "db", "object_id_int"],
+                name="reversion_version_int_idx",
+            ),
+        )
         ordering = ("-pk",)
 
 
+class VersionHead(models.Model):
+
+    """The latest version of a model instance, for models registered with ``track_heads``."""
+
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        help_text="Content type of the model under version control.",
+    )
+
+    db = models.CharField(
+        max_length=191,
+        help_text="The database the model under version control is stored in.",
+    )
+
+    object_id = models.CharField(
+        max_length=191,
+        help_text="Primary key of the model under version control.",
+    )
+
+    version = models.ForeignKey(
+        Version,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        help_text="The latest version of the model, or null if it needs to be repaired.",
+    )
+
+    class Meta:
+        app_label = 'reversion'
+        unique_together = (
+            ("content_type", "db", "object_id"),
+        )
+
+
+class VersionHeadStatus(models.Model):
+
+    """Marks the heads of a model in a database as complete, so they can be used instead of aggregating versions."""
+
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        help_text="Content type of the model under version control.",
+    )
+
+    db = models.CharField(
+        max_length=191,
+        help_text="The database the model under version control is stored in.",
+    )
+
+    class Meta:
+        app_label = 'reversion'
+        unique_together = (
+            ("content_type", "db"),
+        )
+
+
+_INTEGER_FIELDS = (
+    "AutoField",
+    "BigAutoField",
+    "SmallAutoField",
+    "IntegerField",
+    "BigIntegerField",
+    "SmallIntegerField",
+    "PositiveIntegerField",
+    "PositiveBigIntegerField",
+    "PositiveSmallIntegerField",
+)
+
+
+def _is_integer_field(field):
+    # Follow relations to the field that actually stores the value.
+    while field.remote_field is not None:
+        field = field.target_field
+    return field.get_internal_type() in _INTEGER_FIELDS
+
+
+def _has_integer_pk(model):
+    return _is_integer_field(model._meta.pk)
+
+
+def _get_object_id_field_name(versions, model):
+    """
+    Returns the name of the Version field to match with the primary key of the model, preferring object_id_int if it
+    is populated for all the versions.
+    """
+    if _has_integer_pk(model) and not versions.filter(object_id_int__isnull=True).exists():
+        return "object_id_int"
+    return "object_id"
+
+
+def _get_object_id_join_sql(connection, model, alias):
+    """
+    Returns SQL matching the object_id column of the given table alias with the primary key of the model, or None if
+    the database can't join them efficiently.
+    """
+    object_id = "{alias}.{object_id}".format(
+        alias=alias,
+        object_id=connection.ops.quote_name("object_id"),
+    )
+    model_id = "{model}.{model_id}".format(
+        model=connection.ops.quote_name(model._meta.db_table),
+        model_id=connection.ops.quote_name(model._meta.pk.column),
+    )
+    if connection.vendor in ("sqlite", "postgresql", "oracle"):
+        return "{object_id} = CAST({model_id} as {str})".format(
+            object_id=object_id,
+            model_id=model_id,
+            str=Version._meta.get_field("object_id").db_type(connection),
+        )
+    if connection.vendor == "mysql":
+        # MySQL can only CAST to CHAR, and comparing strings risks mixing collations, so cast the object_id to an
+        # integer instead. This also lets MySQL use the primary key index of the model.
+        if _has_integer_pk(model):
+            return "{model_id} = CAST({object_id} AS SIGNED)".format(
+                object_id=object_id,
+                model_id=model_id,
+            )
+    return None
+
+
+def _get_content_hash(serialized_data):
+    return hashlib.sha1(force_bytes(serialized_data)).hexdigest()
+
+
+def _get_delta(keyframe_data, serialized_data):
+    """
+    Returns the fields of serialized_data that differ from keyframe_data, or None if the data can't be stored as a
+    delta.
+    """
+    keyframe_objs = json.loads(keyframe_data)
+    objs = json.loads(serialized_data)
+    if len(keyframe_objs) != 1 or len(objs) != 1:
+        return None
+    keyframe_obj, obj = keyframe_objs[0], objs[0]
+    if keyframe_obj["model"] != obj["model"] or set(keyframe_obj["fields"]) != set(obj["fields"]):
+        return None
+    obj["fields"] = {
+        name: value
+        for name, value
+        in obj["fields"].items()
+        if keyframe_obj["fields"][name] != value
+    }
+    return json.dumps([obj], separators=(",", ":"))
+
+
+def _apply_delta(keyframe_data, delta_data):
+    objs = json.loads(keyframe_data)
+    delta_obj = json.loads(delta_data)[0]
+    objs[0]["pk"] = delta_obj["pk"]
+    objs[0]["fields"].update(delta_obj["fields"])
+    return json.dumps(objs, separators=(",", ":"))
+
+
+def _prefetch_field_dicts(versions):
+    """
+    Fills in the field_dict of the given versions.
+
+    The parent versions of inherited models are loaded with one query per level of inheritance, rather than one query
+    per parent link of each version. Versions with missing parent versions are left alone, so accessing their
+    field_dict raises the usual error.
+    """
+    versions = [version for version in versions if "field_dict" not in version.__dict__]
+    if not versions:
+        return
+    # Find the keys of the parent versions, grouped by the database the versions are stored in, and the content type
+    # and database of the parent objects.
+    version_parent_keys = []
+    group_parent_keys = defaultdict(set)
+    for version in versions:
+        field_dict = version._local_field_dict
+        parent_keys = []
+        for parent_model, field in _get_plan(version._model).parents:
+            content_type_id = _get_content_type(parent_model, version._state.db).id
+            parent_key = (
+                version.revision_id,
+                content_type_id,
+                force_text(field_dict[field.attname]),
+                version.db,
+            )
+            parent_keys.append(parent_key)
+            group_parent_keys[(version._state.db, content_type_id, version.db)].add(parent_key)
+        version_parent_keys.append((version, field_dict, parent_keys))
+    # Load the parent versions in chunks. Each chunk uses two query parameters per parent version.
+    parent_versions = {}
+    for (using, content_type_id, db), parent_keys in group_parent_keys.items():
+        parent_keys = sorted(parent_keys)
+        chunk_size = max(1, _get_batch_size(_JOIN_CHUNK_SIZE, using) // 2)
+        for i in range(0, len(parent_keys), chunk_size):
+            chunk = parent_keys[i:i + chunk_size]
+            chunk_keys = frozenset(chunk)
+            for parent_version in Version.objects.using(using).filter(
+                revision_id__in={parent_key[0] for parent_key in chunk},
+                content_type_id=content_type_id,
+                object_id__in={parent_key[2] for parent_key in chunk},
+                db=db,
+            ):
+                parent_key = (
+                    parent_version.revision_id,
+                    parent_version.content_type_id,
+                    parent_version.object_id,
+                    parent_version.db,
+                )
+                # Skip versions that only match the parts of different keys.
+                if parent_key in chunk_keys:
+                    parent_versions[(using,) + parent_key] = parent_version
+    # Parent versions can have parents of their own.
+    _prefetch_field_dicts(parent_versions.values())
+    # Add parent data.
+    for version, field_dict, parent_keys in version_parent_keys:
+        parents = [parent_versions.get((version._state.db,) + parent_key) for parent_key in parent_keys]
+        if not all(
+            parent_version is not None and "field_dict" in parent_version.__dict__
+            for parent_version
+            in parents
+        ):
+            continue
+        for parent_version in parents:
+            field_dict.update(parent_version.field_dict)
+        version.__dict__["field_dict"] = field_dict
+
+
 class _Str(models.Func):
 
     """Casts a value to the database's text type."""
@@ -326,39 +1119,146 @@ class _Str(models.Func):
         return super(_Str, self).as_sql(compiler, connection)
 
 
+_JOIN_CHUNK_SIZE = 500
+
+
+def _iter_join_chunks(method, left_query, left_field_name, right_query, right_field_name, chunk_size=_JOIN_CHUNK_SIZE):
+    """
+    Yields chunks of the distinct left_field_name values of left_query that are in ("filter") or not in ("exclude")
+    the right_field_name values of right_query.
+
+    The queries can use different databases. The left values are read in sorted chunks, and only the right values
+    matching each chunk are loaded, so memory use and query parameters are bounded by chunk_size.
+    """
+    right_field = right_query.model._meta.get_field(right_field_name)
+    chunk_size = _get_batch_size(chunk_size, left_query.db, right_query.db)
+    left_query = left_query.order_by(left_field_name).values_list(left_field_name, flat=True).distinct()
+    right_query = right_query.order_by().values_list(right_field_name, flat=True)
+    last_value = None
+    while True:
+        chunk_query = left_query
+        if last_value is not None:
+            chunk_query = chunk_query.filter(**{"{}__gt".format(left_field_name): last_value})
+        left_values = list(chunk_query[:chunk_size])
+        if not left_values:
+            return
+        last_value = left_values[-1]
+        # Convert the left values to the type of the right field, skipping values that can't match.
+        right_lookup_values = []
+        for left_value in left_values:
+            try:
+                right_lookup_values.append(right_field.to_python(force_text(left_value)))
+            except ValidationError:
+                pass
+        right_values = frozenset(
+            force_text(right_value)
+            for right_value
+            in right_query.filter(**{"{}__in".format(right_field_name): right_lookup_values}).iterator()
+        ) if right_lookup_values else frozenset()
+        chunk = [
+            left_value
+            for left_value
+            in left_values
+            if (force_text(left_value) in right_values) == (method == "filter")
+        ]
+        if chunk:
+            yield chunk
+
+
+# Query parameters left over for the rest of a query that matches a batch of values.
+_RESERVED_QUERY_PARAMS = 20
+
+
+def _get_batch_size(batch_size, *usings):
+    """Returns the batch size, reduced to fit in the query parameter limit of the given databases."""
+    for using in usings:
+        # Django < 2.0 doesn't know the query parameter limit of the database.
+        max_query_params = getattr(connections[using].features, "max_query_params", None)
+        if max_query_params is not None:
+            batch_size = min(batch_size, max(1, max_query_params - _RESERVED_QUERY_PARAMS))
+    return batch_size
+
+
+class _InPks(In):
+
+    """
+    Matches integer primary keys gathered from an iterable when the query is first compiled.
+
+    The keys are written into the SQL, so any number of keys can be matched without a query parameter for each key, and
+    without creating a temporary table. Databases that limit the length of IN lists are given several lists.
+    """
+
+    def __init__(self, lhs, pks):
+        # Shared by copies of the lookup, so the keys are only gathered once.
+        self._pks = {"pks": pks}
+        super(_InPks, self).__init__(lhs, ())
+
+    def get_prep_lookup(self):
+        return self.rhs
+
+    def as_sql(self, compiler, connection):
+        pks = self._pks["pks"]
+        if not isinstance(pks, list):
+            pks = self._pks["pks"] = [int(pk) for pk in pks]
+        if not pks:
+            raise EmptyResultSet
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        max_in_list_size = connection.ops.max_in_list_size() or len(pks)
+        sqls = [
+            "{} IN ({})".format(lhs_sql, ", ".join(str(pk) for pk in pks[i:i + max_in_list_size]))
+            for i
+            in range(0, len(pks), max_in_list_size)
+        ]
+        return "({})".format(" OR ".join(sqls)), list(lhs_params) * len(sqls)
+
+
+def _filter_pks(queryset, pks):
+    """Filters the queryset by the integer primary keys in pks, an iterable read when the query is compiled."""
+    queryset = queryset.all()
+    query = queryset.query
+    query.where.add(_InPks(queryset.model._meta.pk.get_col(query.get_initial_alias()), pks), AND)
+    return queryset
+
+
+def _can_subquery(left_query, left_field_name, right_query, right_field_name):
+    """Returns True if _safe_subquery can match the queries in the database."""
+    left_field = left_query.model._meta.get_field(left_field_name)
+    right_field = right_query.model._meta.get_field(right_field_name)
+    return left_query.db == right_query.db and (
+        left_field.get_internal_type() == right_field.get_internal_type() or
+        _is_integer_field(left_field) and _is_integer_field(right_field) or
+        connections[left_query.db].vendor in ("sqlite", "postgresql")
+    )
+
+
 def _safe_subquery(method, left_query, left_field_name, right_subquery, right_field_name):
+    """
+    Returns the left_query rows with a left_field_name that is in ("filter") or not in ("exclude") the right_field_name
+    values of right_subquery, using a subquery. The queries must pass _can_subquery().
+    """
     right_subquery = right_subquery.order_by().values_list(right_field_name, flat=True)
     left_field = left_query.model._meta.get_field(left_field_name)
     right_field = right_subquery.model._meta.get_field(right_field_name)
-    # If the databases don't match, we have to do it in-memory.
-    # If it's not a supported database, we also have to do it in-memory.
-    if (
-        left_query.db != right_subquery.db or not
-        (
-            left_field.get_internal_type() != right_field.get_internal_type() and
-            connections[left_query.db].vendor in ("sqlite", "postgresql")
-        )
-    ):
-        return getattr(left_query, method)(**{
-            "{}__in".format(left_field_name): list(right_subquery.iterator()),
+    # Fields of different types are compared as text, unless they are both integers.
+    cast = left_field.get_internal_type() != right_field.get_internal_type() and not (
+        _is_integer_field(left_field) and _is_integer_field(right_field)
+    )
+    # If the left hand side is not a text field, we need to cast it.
+    if cast and not isinstance(left_field, (models.CharField, models.TextField)):
+        left_field_name_str = "{}_str".format(left_field_name)
+        left_query = left_query.annotate(**{
+            left_field_name_str: _Str(left_field_name),
         })
-    else:
-        # If the left hand side is not a text field, we need to cast it.
-        if not isinstance(left_field, (models.CharField, models.TextField)):
-            left_field_name_str = "{}_str".format(left_field_name)
-            left_query = left_query.annotate(**{
-                left_field_name_str: _Str(left_field_name),
-            })
-            left_field_name = left_field_name_str
-        # If the right hand side is not a text field, we need to cast it.
-        if not isinstance(right_field, (models.CharField, models.TextField)):
-            right_field_name_str = "{}_str".format(right_field_name)
-            right_subquery = right_subquery.annotate(**{
-                right_field_name_str: _Str(right_field_name),
-            }).values_list(right_field_name_str, flat=True)
-            right_field_name = right_field_name_str
-        # Use Exists if running on the same DB, it is much much faster
-        exist_annotation_name = "{}_annotation_str".format(right_subquery.model._meta.db_table)
-        right_subquery = right_subquery.filter(**{right_field_name: models.OuterRef(left_field_name)})
-        left_query = left_query.annotate(**{exist_annotation_name: models.Exists(right_subquery)})
-        return getattr(left_query, method)(**{exist_annotation_name: True})
+        left_field_name = left_field_name_str
+    # If the right hand side is not a text field, we need to cast it.
+    if cast and not isinstance(right_field, (models.CharField, models.TextField)):
+        right_field_name_str = "{}_str".format(right_field_name)
+        right_subquery = right_subquery.annotate(**{
+            right_field_name_str: _Str(right_field_name),
+        }).values_list(right_field_name_str, flat=True)
+        right_field_name = right_field_name_str
+    # Use Exists, it is much much faster than loading the values.
+    exist_annotation_name = "{}_annotation_str".format(right_subquery.model._meta.db_table)
+    right_subquery = right_subquery.filter(**{right_field_name: models.OuterRef(left_field_name)})
+    left_query = left_query.annotate(**{exist_annotation_name: models.Exists(right_subquery)})
+    return getattr(left_query, method)(**{exist_annotation_name: True})
@@ -1,19 +1,44 @@
 from __future__ import unicode_literals
+import atexit
+import logging
 from collections import namedtuple, defaultdict
 from contextlib import contextmanager
-from functools import wraps
-from threading import local
+from functools import wraps, partial
+from threading import local, Lock, Thread
+from timeit import default_timer
 from django.apps import apps
 from django.core import serializers
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models, transaction, router
-from django.db.models.query import QuerySet
-from django.db.models.signals import post_save, m2m_changed
+from django.db import models, transaction, router, connections, close_old_connections
+from django.db.models.fields.related_descriptors import ReverseManyToOneDescriptor
+from django.db.models.query import QuerySet, prefetch_related_objects
+from django.db.models.signals import pre_save, post_save, m2m_changed
 from django.utils.encoding import force_text
-from django.utils import timezone, six
+from django.utils.functional import cached_property
+from django.utils import timezone
+from reversion.compression import get_codec
 from reversion.errors import RevisionManagementError, RegistrationError
 from reversion.signals import pre_revision_commit, post_revision_commit
 
+try:
+    from django.utils.six import get_unbound_function, string_types
+    from django.utils.six.moves import queue
+except ImportError:  # Django >= 3.0, which only supports Python 3
+    import queue
+    string_types = (str,)
+
+    def get_unbound_function(func):
+        return func
+try:
+    from asyncio import iscoroutinefunction
+except ImportError:  # Python 2.7
+    def iscoroutinefunction(func):
+        return False
+try:
+    from contextvars import ContextVar
+except ImportError:  # Python < 3.7
+    ContextVar = None
+
 
 _VersionOptions = namedtuple("VersionOptions", (
     "fields",
@@ -21,9 +46,22 @@ _VersionOptions = namedtuple("VersionOptions", (
     "format",
     "for_concrete_model",
     "ignore_duplicates",
+    "compression",
+    "keyframe_interval",
+    "blob_storage",
+    "track_heads",
 ))
 
 
+logger = logging.getLogger(__name__)
+
+
+_BULK_CREATE_BATCH_SIZE = 500
+
+
+_DELTA_FORMATS = ("json", "reversion")
+
+
 _StackFrame = namedtuple("StackFrame", (
     "manage_manually",
     "user",
@@ -31,16 +69,108 @@ _StackFrame = namedtuple("StackFrame", (
     "date_created",
     "db_versions",
     "meta",
+    "defer_serialization",
 ))
 
 
+_DeferredVersion = namedtuple("DeferredVersion", (
+    "model",
+    "object_id",
+    "model_db",
+    "explicit",
+))
+
+
+_WriteBehindOptions = namedtuple("WriteBehindOptions", (
+    "executor",
+    "failure_policy",
+    "max_retries",
+))
+
+
+_WRITE_BEHIND_FAILURE_POLICIES = ("log", "retry", "raise")
+
+
+_CaptureStats = namedtuple("CaptureStats", (
+    "versions",
+    "serialization_time",
+))
+
+
+class _CapturePlan(object):
+
+    """The registration of a model, with everything needed to capture its versions resolved once."""
+
+    def __init__(self, model, version_options):
+        self.model = model
+        self.concrete_model = model._meta.concrete_model
+        self.version_options = version_options
+        # Capture stats are updated from every thread that saves the model.
+        self.stats_lock = Lock()
+        self.versions = 0
+        self.serialization_time = 0.0
+
+    # Fields and relations are resolved on first use, as lazy relations may not be ready at registration time.
+
+    @cached_property
+    def fields(self):
+        opts = self.concrete_model._meta
+        # Unknown field names are ignored, as they are by the serializers.
+        fields = {field.name: field for field in tuple(opts.local_fields) + tuple(opts.many_to_many)}
+        return tuple(fields[field_name] for field_name in self.version_options.fields if field_name in fields)
+
+    @cached_property
+    def field_names(self):
+        return frozenset(field.name for field in self.fields)
+
+    @cached_property
+    def attnames(self):
+        return tuple(field.attname for field in self.fields if not isinstance(field, models.ManyToManyField))
+
+    @cached_property
+    def m2m_attnames(self):
+        return tuple(field.attname for field in self.fields if isinstance(field, models.ManyToManyField))
+
+    @cached_property
+    def parents(self):
+        return tuple(self.concrete_model._meta.parents.items())
+
+    @cached_property
+    def prefetch_follow(self):
+        return tuple(
+            follow_name
+            for follow_name
+            in self.version_options.follow
+            if _is_prefetchable(self.model, follow_name)
+        )
+
+
 class _Local(local):
 
     def __init__(self):
         self.stack = ()
 
 
-_local = _Local()
+class _ContextLocal(object):
+
+    """
+    Stores the revision stack in a context variable, so coroutines running in the same thread
+    each see their own revisions.
+    """
+
+    def __init__(self):
+        self._stack = ContextVar("reversion_stack", default=())
+
+    @property
+    def stack(self):
+        return self._stack.get()
+
+    @stack.setter
+    def stack(self, stack):
+        self._stack.set(stack)
+
+
+_local = _Local() if ContextVar is None else _ContextLocal()
 
 
 def is_active():
@@ -53,22 +183,17 @@ def _current_frame():
     return _local.stack[-1]
 
 
-def _copy_db_versions(db_versions):
-    return {
-        db: versions.copy()
-        for db, versions
-        in db_versions.items()
-    }
-
-
-def _push_frame(manage_manually, using):
+def _push_frame(manage_manually, using, defer_serialization):
     if is_active():
         current_frame = _current_frame()
-        db_versions = _copy_db_versions(current_frame.db_versions)
+        # Nested frames share the versions and meta buffers of their parent frame, so adding to the revision never
+        # needs to copy what is already in it.
+        db_versions = current_frame.db_versions.copy()
         db_versions.setdefault(using, {})
         stack_frame = current_frame._replace(
             manage_manually=manage_manually,
             db_versions=db_versions,
+            defer_serialization=defer_serialization,
         )
     else:
         stack_frame = _StackFrame(
@@ -77,7 +202,8 @@ def _push_frame(manage_manually, using):
             comment="",
             date_created=timezone.now(),
             db_versions={using: {}},
-            meta=(),
+            meta=[],
+            defer_serialization=defer_serialization,
         )
     _local.stack += (stack_frame,)
 
@@ -90,18 +216,10 @@ def _pop_frame():
     prev_frame = _current_frame()
     _local.stack = _local.stack[:-1]
     if is_active():
-        current_frame = _current_frame()
-        db_versions = {
-            db: prev_frame.db_versions[db]
-            for db
-            in current_frame.db_versions.keys()
-        }
         _update_frame(
             user=prev_frame.user,
             comment=prev_frame.comment,
             date_created=prev_frame.date_created,
-            db_versions=db_versions,
-            meta=prev_frame.meta,
         )
 
 
@@ -134,12 +252,11 @@ def get_date_created():
 
 
 def add_meta(model, **values):
-    _update_frame(meta=_current_frame().meta + ((model, values),))
+    _current_frame().meta.append((model, values))
 
 
 def _follow_relations(obj):
-    version_options = _get_options(obj.__class__)
-    for follow_name in version_options.follow:
+    for follow_name in _get_options(obj.__class__).follow:
         try:
             follow_obj = getattr(obj, follow_name)
         except ObjectDoesNotExist:
@@ -156,56 +273,172 @@ def _follow_relations(obj):
             ))
 
 
-def _follow_relations_recursive(obj):
-    def do_follow(obj):
-        if obj not in relations:
-            relations.add(obj)
-            for related in _follow_relations(obj):
-                do_follow(related)
+def _is_prefetchable(model, follow_name):
+    descriptor = getattr(model, follow_name, None)
+    return isinstance(descriptor, ReverseManyToOneDescriptor) or hasattr(descriptor, "get_prefetch_queryset")
+
+
+@contextmanager
+def _prefetch_relations(objs):
+    # Load the followed relations of all objects, using one query per model and relation.
+    objs_by_model = defaultdict(list)
+    for obj in objs:
+        objs_by_model[obj.__class__].append(obj)
+    prefetched_names = []
+    for model, model_objs in objs_by_model.items():
+        follow_names = _get_plan(model).prefetch_follow
+        if follow_names:
+            for obj in model_objs:
+                prefetched_names.append((obj, frozenset(getattr(obj, "_prefetched_objects_cache", ()))))
+            prefetch_related_objects(model_objs, *follow_names)
+    try:
+        yield
+    finally:
+        # Discard the prefetched relations, so the objects don't go stale outside of django-reversion.
+        for obj, names in prefetched_names:
+            prefetched_objects_cache = getattr(obj, "_prefetched_objects_cache", {})
+            for name in set(prefetched_objects_cache).difference(names):
+                del prefetched_objects_cache[name]
+
+
+def _follow_relations_recursive(objs):
     relations = set()
-    do_follow(obj)
+    while objs:
+        # Follow the relations of all objects, one level at a time.
+        objs = [obj for obj in objs if obj not in relations]
+        relations.update(objs)
+        with _prefetch_relations(objs):
+            objs = [follow_obj for obj in objs for follow_obj in _follow_relations(obj)]
     return relations
 
 
+def _get_version_key(obj, using):
+    return (_get_content_type(obj.__class__, using), force_text(obj.pk))
+
+
+def _get_version_id(version_key):
+    content_type, object_id = version_key
+    return (content_type.pk, object_id)
+
+
 def _add_to_revision(obj, using, model_db, explicit):
-    from reversion.models import Version
     # Exit early if the object is not fully-formed.
     if obj.pk is None:
         return
-    version_options = _get_options(obj.__class__)
-    content_type = _get_content_type(obj.__class__, using)
-    object_id = force_text(obj.pk)
-    version_key = (content_type, object_id)
-    # If the obj is already in the revision, stop now.
-    db_versions = _current_frame().db_versions
-    versions = db_versions[using]
-    if version_key in versions and not explicit:
+    # If serialization is deferred, just note the object for now.
+    if _current_frame().defer_serialization:
+        version_key = _get_version_key(obj, using)
+        versions = _current_frame().db_versions[using]
+        if version_key not in versions or explicit:
+            versions[version_key] = _DeferredVersion(
+                model=obj.__class__,
+                object_id=obj.pk,
+                model_db=model_db,
+                explicit=explicit,
+            )
         return
+    _add_versions((obj,), using, model_db, explicit)
+
+
+def _add_versions(objs, using, model_db, explicit):
+    # Each object is paired with the key of the version that followed it, if any.
+    obj_sources = [(obj, None) for obj in objs]
+    while obj_sources:
+        objs = [obj for obj, source_key in obj_sources if _add_version(obj, using, model_db, explicit, source_key)]
+        # Follow the relations of all added objects, one level at a time.
+        with _prefetch_relations(objs):
+            obj_sources = [
+                (follow_obj, _get_version_key(obj, using))
+                for obj in objs
+                for follow_obj in _follow_relations(obj)
+            ]
+        explicit = False
+
+
+def _add_version(obj, using, model_db, explicit, source_key=None):
+    from reversion.models import Version, _get_content_hash, _has_integer_pk
+    # Exit early if the object is not fully-formed.
+    if obj.pk is None:
+        return False
+    version_key = _get_version_key(obj, using)
+    # If the obj is already in the revision, stop now.
+    versions = _current_frame().db_versions[using]
+    previous_version = versions.get(version_key)
+    if previous_version is not None and not isinstance(previous_version, _DeferredVersion) and not explicit:
+        # Note that the version is also followed from here.
+        if previous_version._follow_sources is not None and source_key is not None:
+            previous_version._follow_sources.add(_get_version_id(source_key))
+        return False
     # Get the version data.
+    plan = _get_plan(obj.__class__)
+    version_options = plan.version_options
+    content_type, object_id = version_key
+    serialization_start = default_timer()
+    serialized_data = serializers.serialize(
+        version_options.format,
+        (obj,),
+        fields=plan.field_names,
+    )
+    with plan.stats_lock:
+        plan.serialization_time += default_timer() - serialization_start
+        plan.versions += 1
     version = Version(
         content_type=content_type,
         object_id=object_id,
+        object_id_int=obj.pk if _has_integer_pk(obj.__class__) else None,
         db=model_db,
         format=version_options.format,
-        serialized_data=serializers.serialize(
-            version_options.format,
-            (obj,),
-            fields=version_options.fields,
-        ),
+        serialized_data=serialized_data,
         object_repr=force_text(obj),
+        content_hash=_get_content_hash(serialized_data),
     )
-    # If the version is a duplicate, stop now.
-    if version_options.ignore_duplicates and explicit:
-        previous_version = Version.objects.using(using).get_for_object(obj, model_db=model_db).first()
-        if previous_version and previous_version._local_field_dict == version._local_field_dict:
-            return
+    # Duplicate versions are removed in a single batch when the revision is saved.
+    version._ignore_duplicates = version_options.ignore_duplicates and explicit
+    # Versions only added by following other versions are left out if all of those versions are duplicates.
+    version._follow_sources = None if explicit or source_key is None else {_get_version_id(source_key)}
+    # Delta encoding and compression are applied in a single batch when the revision is saved.
+    version._raw_serialized_data = serialized_data
+    version._compression = version_options.compression
+    version._keyframe_interval = version_options.keyframe_interval
+    version._blob_storage = version_options.blob_storage
+    version._track_heads = version_options.track_heads
     # Store the version.
-    db_versions = _copy_db_versions(db_versions)
-    db_versions[using][version_key] = version
-    _update_frame(db_versions=db_versions)
-    # Follow relations.
-    for follow_obj in _follow_relations(obj):
-        _add_to_revision(follow_obj, using, model_db, False)
+    versions[version_key] = version
+    return True
+
+
+def _add_deferred_versions(using):
+    versions = _current_frame().db_versions[using]
+    deferred_versions = [
+        (version_key, version)
+        for version_key, version
+        in versions.items()
+        if isinstance(version, _DeferredVersion)
+    ]
+    # Load the final state of all deferred objects, one query per model and db.
+    # Use _base_manager so we don't have problems when _default_manager is overriden
+    model_db_pks = defaultdict(set)
+    for version_key, version in deferred_versions:
+        model_db_pks[(version.model, version.model_db)].add(version.object_id)
+    model_db_objs = {
+        (model, model_db): {
+            force_text(pk): obj
+            for pk, obj
+            in model._base_manager.using(model_db).in_bulk(pks).items()
+        }
+        for (model, model_db), pks in model_db_pks.items()
+    }
+    # Drop any deferred objects that no longer exist, and group the rest by db.
+    db_explicit_objs = defaultdict(list)
+    for version_key, version in deferred_versions:
+        obj = model_db_objs[(version.model, version.model_db)].get(force_text(version.object_id))
+        if obj is None:
+            del versions[version_key]
+        else:
+            db_explicit_objs[(version.model_db, version.explicit)].append(obj)
+    # Serialize the deferred objects, and the objects they follow.
+    for (model_db, explicit), objs in db_explicit_objs.items():
+        _add_versions(objs, using, model_db, explicit)
 
 
 def add_to_revision(obj, model_db=None):
@@ -214,8 +447,204 @@ def add_to_revision(obj, model_db=None):
         _add_to_revision(obj, db, model_db, True)
 
 
-def _save_revision(versions, user=None, comment="", meta=(), date_created=None, using=None):
-    from reversion.models import Revision
+def _get_previous_versions(versions, using):
+    from reversion.models import Version
+    # Group the object ids to check by content type and db.
+    content_type_db_object_ids = defaultdict(set)
+    head_content_type_dbs = set()
+    for version in versions:
+        if version._ignore_duplicates:
+            content_type_db_object_ids[(version.content_type_id, version.db)].add(version.object_id)
+            if version._track_heads:
+                head_content_type_dbs.add((version.content_type_id, version.db))
+    # Load the latest version of every object to check, using one query per content type and db.
+    previous_versions = {}
+    for (content_type_id, db), object_ids in content_type_db_object_ids.items():
+        if (content_type_id, db) in head_content_type_dbs:
+            latest_version_pks = _get_head_version_pks(content_type_id, db, object_ids, using)
+            if latest_version_pks is not None:
+                for previous_version in Version.objects.using(using).filter(
+                    pk__in=latest_version_pks.values(),
+                ).iterator():
+                    previous_versions[(content_type_id, db, previous_version.object_id)] = previous_version
+                # Objects without heads are new, or were versioned before track_heads was enabled.
+                object_ids = object_ids.difference(latest_version_pks)
+                if not object_ids:
+                    continue
+        object_versions = Version.objects.using(using).filter(
+            content_type_id=content_type_id,
+            db=db,
+            object_id__in=object_ids,
+        )
+        if connections[using].features.can_distinct_on_fields:
+            latest_versions = object_versions.order_by("object_id", "-pk").distinct("object_id")
+        else:
+            latest_versions = Version.objects.using(using).filter(
+                pk__in=object_versions.order_by().values_list("object_id").annotate(
+                    latest_pk=models.Max("pk"),
+                ).values_list("latest_pk", flat=True),
+            )
+        for previous_version in latest_versions.iterator():
+            previous_versions[(content_type_id, db, previous_version.object_id)] = previous_version
+    return previous_versions
+
+
+def _get_head_version_pks(content_type_id, db, object_ids, using):
+    from reversion.models import VersionHead
+    version_pks = dict(VersionHead.objects.using(using).filter(
+        content_type_id=content_type_id,
+        db=db,
+        object_id__in=object_ids,
+    ).values_list("object_id", "version_id").iterator())
+    # Heads that need repairing can't be used.
+    if None in version_pks.values():
+        return None
+    return version_pks
+
+
+def _mark_heads_complete(first_version_pks, using):
+    from reversion.models import Version, VersionHeadStatus
+    # The heads of a model are complete if it had no versions before these ones, since all of them have heads.
+    for (content_type_id, db), first_version_pk in first_version_pks.items():
+        if VersionHeadStatus.objects.using(using).filter(content_type_id=content_type_id, db=db).exists():
+            continue
+        if not Version.objects.using(using).filter(
+            content_type_id=content_type_id,
+            db=db,
+            pk__lt=first_version_pk,
+        ).exists():
+            VersionHeadStatus.objects.using(using).get_or_create(content_type_id=content_type_id, db=db)
+
+
+def _save_heads(versions, using):
+    from reversion.models import VersionHead
+    connection = connections[using]
+    # An object can have several new versions if several revisions are saved together.
+    version_pks = {}
+    first_version_pks = {}
+    for version in versions:
+        if version._track_heads:
+            version_key = (version.content_type_id, version.db, version.object_id)
+            version_pks[version_key] = max(version.pk, version_pks.get(version_key, version.pk))
+            content_type_db = (version.content_type_id, version.db)
+            first_version_pks[content_type_db] = min(version.pk, first_version_pks.get(content_type_db, version.pk))
+    rows = [version_key + (version_pk,) for version_key, version_pk in version_pks.items()]
+    if not rows:
+        return
+    _mark_heads_complete(first_version_pks, using)
+    # Upsert in the database, if possible. Heads are never moved to an older version, in case a concurrent
+    # transaction has saved a newer one.
+    qn = connection.ops.quote_name
+    if connection.vendor == "postgresql" or (
+        connection.vendor == "sqlite" and connection.Database.sqlite_version_info >= (3, 24, 0)
+    ):
+        upsert_sql = (
+            "ON CONFLICT ({content_type_id}, {db}, {object_id}) DO UPDATE SET {version_id} = EXCLUDED.{version_id} "
+            "WHERE {head}.{version_id} IS NULL OR {head}.{version_id} < EXCLUDED.{version_id}"
+        )
+    elif connection.vendor == "mysql":
+        upsert_sql = "ON DUPLICATE KEY UPDATE {version_id} = GREATEST(COALESCE({version_id}, 0), VALUES({version_id}))"
+    else:
+        upsert_sql = None
+    if upsert_sql is not None:
+        # Keep each statement within the query parameter limit of the database.
+        batch_size = max(1, min(
+            _BULK_CREATE_BATCH_SIZE,
+            connection.ops.bulk_batch_size(["content_type_id", "db", "object_id", "version_id"], rows),
+        ))
+        with connection.cursor() as cursor:
+            for i in range(0, len(rows), batch_size):
+                batch_rows = rows[i:i + batch_size]
+                cursor.execute(
+                    (
+                        "INSERT INTO {head} ({content_type_id}, {db}, {object_id}, {version_id}) VALUES {values} " +
+                        upsert_sql
+                    ).format(
+                        head=qn(VersionHead._meta.db_table),
+                        content_type_id=qn("content_type_id"),
+                        db=qn("db"),
+                        object_id=qn("object_id"),
+                        version_id=qn("version_id"),
+                        values=", ".join(["(%s, %s, %s, %s)"] * len(batch_rows)),
+                    ),
+                    [value for row in batch_rows for value in row],
+                )
+        return
+    # Otherwise, update existing heads and create the missing ones.
+    for content_type_id, db, object_id, version_pk in rows:
+        head, created = VersionHead.objects.using(using).get_or_create(
+            content_type_id=content_type_id,
+            db=db,
+            object_id=object_id,
+            defaults={"version_id": version_pk},
+        )
+        if not created:
+            VersionHead.objects.using(using).filter(
+                models.Q(version__isnull=True) | models.Q(version__lt=version_pk),
+                pk=head.pk,
+            ).update(version=version_pk)
+
+
+def _repair_heads(using):
+    from reversion.models import Version, VersionHead
+    # Point heads whose version was deleted at the latest remaining version.
+    content_type_db_heads = defaultdict(dict)
+    for head_pk, content_type_id, db, object_id in VersionHead.objects.using(using).filter(
+        version__isnull=True,
+    ).values_list("pk", "content_type_id", "db", "object_id").iterator():
+        content_type_db_heads[(content_type_id, db)][object_id] = head_pk
+    for (content_type_id, db), heads in content_type_db_heads.items():
+        object_ids = list(heads)
+        for i in range(0, len(object_ids), _BULK_CREATE_BATCH_SIZE):
+            batch_object_ids = object_ids[i:i + _BULK_CREATE_BATCH_SIZE]
+            latest_version_pks = dict(Version.objects.using(using).filter(
+                content_type_id=content_type_id,
+                db=db,
+                object_id__in=batch_object_ids,
+            ).order_by().values_list("object_id").annotate(
+                latest_pk=models.Max("pk"),
+            ).values_list("object_id", "latest_pk"))
+            for object_id in batch_object_ids:
+                if object_id in latest_version_pks:
+                    VersionHead.objects.using(using).filter(pk=heads[object_id]).update(
+                        version=latest_version_pks[object_id],
+                    )
+            # Delete heads of objects with no versions left.
+            VersionHead.objects.using(using).filter(pk__in=[
+                heads[object_id]
+                for object_id in batch_object_ids
+                if object_id not in latest_version_pks
+            ]).delete()
+
+
+def _remove_unfollowed_versions(versions):
+    """
+    Returns the versions that were added explicitly, or by following a version that is kept.
+    """
+    kept_ids = set()
+    pending_versions = versions
+    while pending_versions:
+        followed_versions = []
+        unfollowed_versions = []
+        for version in pending_versions:
+            if version._follow_sources is None or not version._follow_sources.isdisjoint(kept_ids):
+                followed_versions.append(version)
+            else:
+                unfollowed_versions.append(version)
+        if not followed_versions:
+            break
+        kept_ids.update((version.content_type_id, version.object_id) for version in followed_versions)
+        pending_versions = unfollowed_versions
+    return [version for version in versions if (version.content_type_id, version.object_id) in kept_ids]
+
+
+def _is_duplicate_version(version, previous_version):
+    if not version._ignore_duplicates or previous_version is None:
+        return False
+    return version._is_duplicate_of(previous_version)
+
+
+def _get_existing_versions(versions):
     # Only save versions that exist in the database.
     # Use _base_manager so we don't have problems when _default_manager is overriden
     model_db_pks = defaultdict(lambda: defaultdict(set))
@@ -231,76 +660,500 @@ def _save_revision(versions, user=None, comment="", meta=(), date_created=None,
         }
         for model, db_pks in model_db_pks.items()
     }
-    versions = [
+    return [
         version for version in versions
         if version.object_id in model_db_existing_pks[version._model][version.db]
     ]
-    # Bail early if there are no objects to save.
-    if not versions:
-        return
-    # Save a new revision.
-    revision = Revision(
-        date_created=date_created,
-        user=user,
-        comment=comment,
+
+
+def _get_keyframes(versions, using):
+    from reversion.models import Version
+    # Group the object ids to check by content type and db.
+    content_type_db_object_ids = defaultdict(set)
+    for version in versions:
+        if version._keyframe_interval is not None:
+            content_type_db_object_ids[(version.content_type_id, version.db)].add(version.object_id)
+    # Load the latest keyframe of every object to check, using one query per content type and db.
+    keyframes = {}
+    for (content_type_id, db), object_ids in content_type_db_object_ids.items():
+        latest_keyframes = Version.objects.using(using).filter(
+            pk__in=Version.objects.using(using).filter(
+                content_type_id=content_type_id,
+                db=db,
+                object_id__in=object_ids,
+                keyframe__isnull=True,
+            ).order_by().values_list("object_id").annotate(
+                latest_pk=models.Max("pk"),
+            ).values_list("latest_pk", flat=True),
+        ).select_related("blob")
+        for keyframe in latest_keyframes.iterator():
+            keyframes[(content_type_id, db, keyframe.object_id)] = keyframe
+    # Count the deltas already saved against each keyframe.
+    delta_counts = dict(Version.objects.using(using).filter(
+        keyframe__in=[keyframe.pk for keyframe in keyframes.values()],
+    ).order_by().values_list("keyframe_id").annotate(
+        delta_count=models.Count("pk"),
+    ).values_list("keyframe_id", "delta_count")) if keyframes else {}
+    return {
+        key: (keyframe, delta_counts.get(keyframe.pk, 0))
+        for key, keyframe in keyframes.items()
+    }
+
+
+def _encode_versions(versions, using):
+    from reversion.models import VersionBlob, _get_content_hash, _get_delta
+    keyframes = _get_keyframes(versions, using)
+    blobs = {}
+    for version in versions:
+        data = version._raw_serialized_data
+        version.keyframe = None
+        # Store the version as a delta against the latest keyframe of its object, unless another keyframe is due.
+        if version._keyframe_interval is not None:
+            version_key = (version.content_type_id, version.db, version.object_id)
+            keyframe, delta_count = keyframes.get(version_key, (None, 0))
+            delta = None
+            if keyframe is not None and keyframe.format == version.format and \
+                    delta_count + 1 < version._keyframe_interval:
+                delta = _get_delta(keyframe._get_serialized_data(), data)
+            if delta is not None and len(delta) < len(data):
+                data = delta
+                version.keyframe = keyframe
+                keyframes[version_key] = (keyframe, delta_count + 1)
+            else:
+                # Later versions of the object in this batch can't refer to an unsaved keyframe.
+                keyframes[version_key] = (None, 0)
+        if version._compression is not None:
+            data = version._compression.compress(data)
+        version.compression = "" if version._compression is None else version._compression.name
+        # Store the data in a blob shared by all versions with the same data.
+        if version._blob_storage:
+            blob_hash = _get_content_hash(data)
+            version.blob = blobs.setdefault(blob_hash, VersionBlob(content_hash=blob_hash, data=data))
+            version.serialized_data = ""
+        else:
+            version.blob = None
+            version.serialized_data = data
+    return list(blobs.values())
+
+
+def _can_ignore_conflicts(using):
+    return getattr(connections[using].features, "supports_ignore_conflicts", False)
+
+
+def _save_blobs(blobs, using):
+    from reversion.models import VersionBlob
+    existing_blob_hashes = frozenset(VersionBlob.objects.using(using).filter(
+        pk__in=[blob.pk for blob in blobs],
+    ).values_list("pk", flat=True).iterator())
+    blobs = [blob for blob in blobs if blob.pk not in existing_blob_hashes]
+    # Another transaction may save the same blobs concurrently.
+    if _can_ignore_conflicts(using):
+        VersionBlob.objects.using(using).bulk_create(
+            blobs,
+            batch_size=_get_bulk_create_batch_size(VersionBlob, blobs, using),
+            ignore_conflicts=True,
+        )
+    else:
+        for blob in blobs:
+            VersionBlob.objects.using(using).get_or_create(pk=blob.pk, defaults={"data": blob.data})
+
+
+def _can_bulk_create_model(model):
+    """
+    Returns whether instances of the model can be bulk created without skipping a custom save() or any save signals.
+    """
+    return (
+        not model._meta.parents and
+        get_unbound_function(model.save) is get_unbound_function(models.Model.save) and
+        not pre_save.has_listeners(model) and
+        not post_save.has_listeners(model)
     )
+
+
+def _get_bulk_create_batch_size(model, objs, using):
+    """
+    Returns the batch size to bulk create the objects with, within the query parameter limit of the database.
+    """
+    connection = connections[using]
+    return max(1, min(
+        _BULK_CREATE_BATCH_SIZE,
+        connection.ops.bulk_batch_size(model._meta.concrete_fields, objs),
+    ))
+
+
+def _can_bulk_create_revisions(using):
+    features = connections[using].features
+    return getattr(features, "can_return_rows_from_bulk_insert", getattr(
+        features,
+        "can_return_ids_from_bulk_insert",
+        False,
+    ))
+
+
+def _save_revisions(revisions, using):
+    from reversion.models import Revision, Version
+    # Check the versions of all revisions together, to use as few queries as possible.
+    existing_versions = _get_existing_versions([
+        version
+        for revision_kwargs in revisions
+        for version in revision_kwargs["versions"]
+    ])
+    # Unsaved model instances aren't hashable, so track them by identity.
+    existing_version_ids = frozenset(map(id, existing_versions))
+    previous_versions = _get_previous_versions(existing_versions, using)
+    revision_versions = []
+    for revision_kwargs in revisions:
+        # Remove versions that are duplicates of the latest saved version of their object, including
+        # versions saved by earlier revisions in this batch.
+        versions = _remove_unfollowed_versions([
+            version
+            for version in revision_kwargs["versions"]
+            if id(version) in existing_version_ids and not _is_duplicate_version(
+                version,
+                previous_versions.get((version.content_type_id, version.db, version.object_id)),
+            )
+        ])
+        for version in versions:
+            previous_versions[(version.content_type_id, version.db, version.object_id)] = version
+        # Skip revisions with no objects to save.
+        if versions:
+            revision = Revision(
+                date_created=revision_kwargs.get("date_created"),
+                user=revision_kwargs.get("user"),
+                comment=revision_kwargs.get("comment", ""),
+            )
+            revision_versions.append((revision, versions, revision_kwargs.get("meta", ())))
+    # Bail early if there are no revisions to save.
+    if not revision_versions:
+        return
+    blobs = _encode_versions([version for revision, versions, meta in revision_versions for version in versions], using)
     # Send the pre_revision_commit signal.
-    pre_revision_commit.send(
-        sender=create_revision,
-        revision=revision,
-        versions=versions,
-    )
-    # Save the revision.
-    revision.save(using=using)
+    for revision, versions, meta in revision_versions:
+        pre_revision_commit.send(
+            sender=create_revision,
+            revision=revision,
+            versions=versions,
+        )
+    # Save the revisions. A multi-row insert can only be used if the backend returns the new primary keys.
+    if len(revision_versions) > 1 and _can_bulk_create_revisions(using):
+        revisions = [revision for revision, versions, meta in revision_versions]
+        Revision.objects.using(using).bulk_create(
+            revisions,
+            batch_size=_get_bulk_create_batch_size(Revision, revisions, using),
+        )
+    else:
+        for revision, versions, meta in revision_versions:
+            revision.save(using=using)
     # Save version models.
-    for version in versions:
-        version.revision = revision
-        version.save(using=using)
+    all_versions = []
+    for revision, versions, meta in revision_versions:
+        for version in versions:
+            version.revision = revision
+        all_versions.extend(versions)
+    _save_blobs(blobs, using)
+    # Bulk inserts skip the save signals, so versions with receivers are saved one at a time.
+    if _can_bulk_create_model(Version):
+        Version.objects.using(using).bulk_create(
+            all_versions,
+            batch_size=_get_bulk_create_batch_size(Version, all_versions, using),
+        )
+    else:
+        for version in all_versions:
+            version.save(force_insert=True, using=using)
+    # Not all database backends return primary keys from a bulk insert, so load any that are missing.
+    if any(version.pk is None for version in all_versions):
+        version_pks = {
+            (revision_id, content_type_id, object_id, db): pk
+            for pk, revision_id, content_type_id, object_id, db
+            in Version.objects.using(using).filter(
+                revision__in=[revision for revision, versions, meta in revision_versions],
+            ).order_by().values_list("pk", "revision_id", "content_type_id", "object_id", "db").iterator()
+        }
+        for version in all_versions:
+            if version.pk is None:
+                version.pk = version_pks[(version.revision_id, version.content_type_id, version.object_id, version.db)]
+    for version in all_versions:
+        version._state.adding = False
+        version._state.db = using
+    # Point the heads of the objects at their new versions.
+    _save_heads(all_versions, using)
     # Save the meta information.
-    for meta_model, meta_fields in meta:
-        meta_model._base_manager.db_manager(using=using).create(
+    meta_objs = defaultdict(list)
+    for revision, versions, meta in revision_versions:
+        for meta_model, meta_fields in meta:
+            meta_objs[meta_model].append(meta_model(
+                revision=revision,
+                **meta_fields
+            ))
+    for meta_model, objs in meta_objs.items():
+        if _can_bulk_create_model(meta_model):
+            meta_model._base_manager.db_manager(using=using).bulk_create(
+                objs,
+                batch_size=_get_bulk_create_batch_size(meta_model, objs, using),
+            )
+        else:
+            for obj in objs:
+                obj.save(force_insert=True, using=using)
+    # Send the post_revision_commit signal.
+    for revision, versions, meta in revision_versions:
+        post_revision_commit.send(
+            sender=create_revision,
             revision=revision,
-            **meta_fields
+            versions=versions,
         )
-    # Send the post_revision_commit signal.
-    post_revision_commit.send(
-        sender=create_revision,
-        revision=revision,
-        versions=versions,
+
+
+def _save_revision(versions, user=None, comment="", meta=(), date_created=None, using=None):
+    _save_revisions([{
+        "versions": versions,
+        "user": user,
+        "comment": comment,
+        "meta": meta,
+        "date_created": date_created,
+    }], using)
+
+
+_write_behind_options = _WriteBehindOptions(
+    executor=None,
+    failure_policy="log",
+    max_retries=3,
+)
+
+_write_behind_lock = Lock()
+
+_write_behind_futures = []
+
+_GROUP_COMMIT_STOP = object()
+
+
+class _GroupCommitWriter(object):
+
+    """
+    Saves revisions queued from any thread on a background thread, merging the revisions queued within
+    ``flush_interval`` seconds into multi-row inserts.
+    """
+
+    def __init__(self, flush_interval, max_batch_size, max_queue_size, shed_load):
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.shed_load = shed_load
+        self.errors = []
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = Thread(target=self._run, name="reversion-group-commit")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, revision_kwargs):
+        try:
+            self._queue.put(revision_kwargs, block=not self.shed_load)
+        except queue.Full:
+            logger.error("Group commit buffer is full, dropping revision")
+
+    def flush(self):
+        self._queue.join()
+
+    def shutdown(self):
+        if self._thread.is_alive():
+            self._queue.put(_GROUP_COMMIT_STOP)
+            self._thread.join()
+
+    def _get_batch(self):
+        batch = []
+        revision_kwargs = self._queue.get()
+        deadline = default_timer() + self.flush_interval
+        while revision_kwargs is not _GROUP_COMMIT_STOP:
+            batch.append(revision_kwargs)
+            timeout = deadline - default_timer()
+            if len(batch) >= self.max_batch_size or timeout <= 0:
+                break
+            try:
+                revision_kwargs = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+        return batch, revision_kwargs is _GROUP_COMMIT_STOP
+
+    def _save_batch(self, revisions, using):
+        if len(revisions) > 1:
+            try:
+                with transaction.atomic(using=using):
+                    _save_revisions(revisions, using)
+                return
+            except Exception:
+                _reset_versions(revisions)
+        # Save each revision on its own, so one failure doesn't lose the rest of the batch.
+        for revision_kwargs in revisions:
+            try:
+                _save_revisions_write_behind(_write_behind_options, [revision_kwargs], using)
+            except Exception as ex:
+                self.errors.append(ex)
+
+    def _run(self):
+        stopped = False
+        while not stopped:
+            batch, stopped = self._get_batch()
+            try:
+                # Revisions are grouped by database, since each database is written in its own transaction.
+                db_batches = defaultdict(list)
+                for revision_kwargs in batch:
+                    db_batches[revision_kwargs["using"]].append(revision_kwargs)
+                for using, revisions in db_batches.items():
+                    self._save_batch(revisions, using)
+            finally:
+                close_old_connections()
+                for _ in range(len(batch) + stopped):
+                    self._queue.task_done()
+
+
+def configure_write_behind(max_workers=None, failure_policy="log", max_retries=3, group_commit=False,
+                           flush_interval=0.005, max_batch_size=100, max_queue_size=1000, shed_load=False):
+    global _write_behind_options
+    if failure_policy not in _WRITE_BEHIND_FAILURE_POLICIES:
+        raise RevisionManagementError("Unknown write-behind failure policy: {failure_policy!r}".format(
+            failure_policy=failure_policy,
+        ))
+    if group_commit and max_workers is not None:
+        raise RevisionManagementError("Write-behind cannot use both a thread pool and group commit")
+    # Finish any writes queued on the old executor. It can't be used once it is shut down, even if a write failed.
+    try:
+        flush_write_behind()
+    finally:
+        if _write_behind_options.executor is not None:
+            _write_behind_options.executor.shutdown()
+            _write_behind_options = _write_behind_options._replace(executor=None)
+    executor = None
+    if max_workers is not None:
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    if group_commit:
+        executor = _GroupCommitWriter(
+            flush_interval=flush_interval,
+            max_batch_size=max_batch_size,
+            max_queue_size=max_queue_size,
+            shed_load=shed_load,
+        )
+    _write_behind_options = _WriteBehindOptions(
+        executor=executor,
+        failure_policy=failure_policy,
+        max_retries=max_retries,
     )
 
 
+def flush_write_behind():
+    executor = _write_behind_options.executor
+    if isinstance(executor, _GroupCommitWriter):
+        executor.flush()
+        exceptions = executor.errors[:]
+        del executor.errors[:]
+    else:
+        with _write_behind_lock:
+            futures = _write_behind_futures[:]
+            del _write_behind_futures[:]
+        # Wait for all writes before raising the first failure.
+        exceptions = [future.exception() for future in futures]
+    for exception in exceptions:
+        if exception is not None:
+            raise exception
+
+
+def _shutdown_write_behind():
+    executor = _write_behind_options.executor
+    if executor is not None:
+        executor.shutdown()
+
+
+atexit.register(_shutdown_write_behind)
+
+
+def _reset_versions(revisions):
+    # Reset the versions, so they can be saved again.
+    for revision_kwargs in revisions:
+        for version in revision_kwargs["versions"]:
+            version.pk = None
+            version._state.adding = True
+
+
+def _save_revisions_write_behind(options, revisions, using):
+    attempts = options.max_retries + 1 if options.failure_policy == "retry" else 1
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic(using=using):
+                _save_revisions(revisions, using)
+        except Exception:
+            _reset_versions(revisions)
+            if attempt + 1 < attempts:
+                continue
+            if options.failure_policy == "raise":
+                raise
+            logger.exception("Failed to save revision after commit")
+        return
+
+
+def _save_revision_write_behind_thread(options, revision_kwargs):
+    try:
+        _save_revisions_write_behind(options, [revision_kwargs], revision_kwargs["using"])
+    finally:
+        close_old_connections()
+
+
+def _submit_write_behind(revision_kwargs):
+    options = _write_behind_options
+    if options.executor is None:
+        _save_revisions_write_behind(options, [revision_kwargs], revision_kwargs["using"])
+        return
+    if isinstance(options.executor, _GroupCommitWriter):
+        options.executor.submit(revision_kwargs)
+        return
+    future = options.executor.submit(_save_revision_write_behind_thread, options, revision_kwargs)
+    with _write_behind_lock:
+        # Only keep finished writes around if they failed, so flush_write_behind() can raise them.
+        _write_behind_futures[:] = [
+            pending_future
+            for pending_future
+            in _write_behind_futures
+            if not pending_future.done() or pending_future.exception() is not None
+        ]
+        _write_behind_futures.append(future)
+
+
 @contextmanager
 def _dummy_context():
     yield
 
 
 @contextmanager
-def _create_revision_context(manage_manually, using, atomic):
-    _push_frame(manage_manually, using)
+def _create_revision_context(manage_manually, using, atomic, defer_serialization, write_behind):
+    _push_frame(manage_manually, using, defer_serialization)
     try:
         context = transaction.atomic(using=using) if atomic else _dummy_context()
         with context:
             yield
             # Only save for a db if that's the last stack frame for that db.
             if not any(using in frame.db_versions for frame in _local.stack[:-1]):
+                _add_deferred_versions(using)
                 current_frame = _current_frame()
-                _save_revision(
-                    versions=current_frame.db_versions[using].values(),
-                    user=current_frame.user,
-                    comment=current_frame.comment,
-                    meta=current_frame.meta,
-                    date_created=current_frame.date_created,
-                    using=using,
-                )
+                revision_kwargs = {
+                    "versions": list(current_frame.db_versions[using].values()),
+                    "user": current_frame.user,
+                    "comment": current_frame.comment,
+                    "meta": list(current_frame.meta),
+                    "date_created": current_frame.date_created,
+                    "using": using,
+                }
+                if write_behind:
+                    transaction.on_commit(partial(_submit_write_behind, revision_kwargs), using=using)
+                else:
+                    _save_revision(**revision_kwargs)
     finally:
         _pop_frame()
 
 
-def create_revision(manage_manually=False, using=None, atomic=True):
+def create_revision(manage_manually=False, using=None, atomic=True, defer_serialization=False, write_behind=False):
     from reversion.models import Revision
     using = using or router.db_for_write(Revision)
-    return _ContextWrapper(_create_revision_context, (manage_manually, using, atomic))
+    return _ContextWrapper(
+        _create_revision_context,
+        (manage_manually, using, atomic, defer_serialization, write_behind),
+    )
 
 
 class _ContextWrapper(object):
@@ -316,7 +1169,21 @@ class _ContextWrapper(object):
     def __exit__(self, exc_type, exc_value, traceback):
         return self._context.__exit__(exc_type, exc_value, traceback)
 
+    # The revision block uses the database, so run it in the same thread as other sync code.
+
+    def __aenter__(self):
+        from asgiref.sync import sync_to_async
+        return sync_to_async(self.__enter__, thread_sensitive=True)()
+
+    def __aexit__(self, exc_type, exc_value, traceback):
+        from asgiref.sync import sync_to_async
+        return sync_to_async(self.__exit__, thread_sensitive=True)(exc_type, exc_value, traceback)
+
     def __call__(self, func):
+        if iscoroutinefunction(func):
+            from reversion.asyncutils import async_revision_decorator
+            return async_revision_decorator(lambda: _ContextWrapper(self._func, self._args), func)
+
         @wraps(func)
         def do_revision_context(*args, **kwargs):
             with self._func(*self._args):
@@ -355,7 +1222,7 @@ def _get_senders_and_signals(model):
     opts = model._meta.concrete_model._meta
     for field in opts.local_many_to_many:
         m2m_model = field.remote_field.through
-        if isinstance(m2m_model, six.string_types):
+        if isinstance(m2m_model, string_types):
             if "." not in m2m_model:
                 m2m_model = "{app_label}.{m2m_model}".format(
                     app_label=opts.app_label,
@@ -365,13 +1232,31 @@ def _get_senders_and_signals(model):
 
 
 def register(model=None, fields=None, exclude=(), follow=(), format="json",
-             for_concrete_model=True, ignore_duplicates=False):
+             for_concrete_model=True, ignore_duplicates=False, compression=None, keyframe_interval=None,
+             blob_storage=False, track_heads=False):
     def register(model):
         # Prevent multiple registration.
         if is_registered(model):
             raise RegistrationError("{model} has already been registered with django-reversion".format(
                 model=model,
             ))
+        # Delta encoding needs a JSON serialization format.
+        if keyframe_interval is not None and format not in _DELTA_FORMATS:
+            raise RegistrationError("{model} must use a JSON serialization format to use keyframe_interval".format(
+                model=model,
+            ))
+        # Resolve the compression codec. Versions are decompressed by codec name, so the codec must be registered.
+        codec = compression
+        if codec is not None:
+            codec_name = codec if isinstance(codec, string_types) else codec.name
+            try:
+                registered_codec = get_codec(codec_name)
+            except KeyError:
+                raise RegistrationError("Unknown compression codec: {codec_name!r}".format(
+                    codec_name=codec_name,
+                ))
+            if isinstance(codec, string_types):
+                codec = registered_codec
         # Parse fields.
         opts = model._meta.concrete_model._meta
         version_options = _VersionOptions(
@@ -389,9 +1274,13 @@ def register(model=None, fields=None, exclude=(), follow=(), format="json",
             format=format,
             for_concrete_model=for_concrete_model,
             ignore_duplicates=ignore_duplicates,
+            compression=codec,
+            keyframe_interval=keyframe_interval,
+            blob_storage=blob_storage,
+            track_heads=track_heads,
         )
         # Register the model.
-        _registered_models[_get_registration_key(model)] = version_options
+        _registered_models[_get_registration_key(model)] = _CapturePlan(model, version_options)
         # Connect signals.
         for sender, signal, signal_receiver in _get_senders_and_signals(model):
             signal.connect(signal_receiver, sender=sender)
@@ -411,11 +1300,24 @@ def _assert_registered(model):
         ))
 
 
-def _get_options(model):
+def _get_plan(model):
     _assert_registered(model)
     return _registered_models[_get_registration_key(model)]
 
 
+def _get_options(model):
+    return _get_plan(model).version_options
+
+
+def get_capture_stats(model):
+    plan = _get_plan(model)
+    with plan.stats_lock:
+        return _CaptureStats(
+            versions=plan.versions,
+            serialization_time=plan.serialization_time,
+        )
+
+
 def unregister(model):
     _assert_registered(model)
     del _registered_models[_get_registration_key(model)]
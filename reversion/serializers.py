@@ -0,0 +1,105 @@
+from __future__ import unicode_literals
+import json
+import sys
+import django
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.serializers.python import Deserializer as PythonDeserializer
+from django.utils.encoding import force_text, is_protected_type
+try:
+    from django.utils.six import reraise, string_types
+except ImportError:  # Django >= 3.0, which only supports Python 3
+    string_types = (str,)
+
+    def reraise(tp, value, tb=None):
+        raise value.with_traceback(tb)
+
+
+_model_fields = {}
+
+
+def _get_fields(model, selected_fields):
+    # Resolve the fields to serialize for the model, in the same way as the built-in serializers.
+    key = (model, selected_fields)
+    try:
+        return _model_fields[key]
+    except KeyError:
+        opts = model._meta.concrete_model._meta
+        fields = tuple(
+            field
+            for field
+            in opts.local_fields
+            if field.serialize and (
+                selected_fields is None or
+                (field.attname[:-3] if field.remote_field else field.attname) in selected_fields
+            )
+        )
+        m2m_fields = tuple(
+            field
+            for field
+            # Django >= 3.0 only serializes the many-to-many fields of the model itself, not those of its parents.
+            in (opts.local_many_to_many if django.VERSION >= (3, 0) else opts.many_to_many)
+            if field.serialize and field.remote_field.through._meta.auto_created and (
+                selected_fields is None or field.attname in selected_fields
+            )
+        )
+        _model_fields[key] = fields, m2m_fields
+        return fields, m2m_fields
+
+
+def _value_from_field(obj, field):
+    value = field.value_from_object(obj)
+    return value if is_protected_type(value) else field.value_to_string(obj)
+
+
+class Serializer(object):
+
+    """
+    Serializes models to the same data as the ``json`` format, without the overhead of the
+    generic serializer machinery.
+    """
+
+    # Only used to store versions. It can't write to a stream, so dumpdata can't use it.
+    internal_use_only = True
+
+    def serialize(self, queryset, fields=None, **options):
+        selected_fields = None if fields is None else frozenset(fields)
+        objects = []
+        for obj in queryset:
+            fields, m2m_fields = _get_fields(obj.__class__, selected_fields)
+            field_data = {
+                field.name: _value_from_field(obj, field)
+                for field
+                in fields
+            }
+            for field in m2m_fields:
+                field_data[field.name] = [
+                    pk if is_protected_type(pk) else force_text(pk)
+                    for pk
+                    in getattr(obj, field.name).values_list("pk", flat=True).iterator()
+                ]
+            objects.append({
+                "model": force_text(obj._meta),
+                "pk": _value_from_field(obj, obj._meta.pk),
+                "fields": field_data,
+            })
+        self.objects = json.dumps(objects, cls=DjangoJSONEncoder, separators=(",", ":"))
+        return self.objects
+
+    def getvalue(self):
+        return self.objects
+
+
+def Deserializer(stream_or_string, **options):
+    if not isinstance(stream_or_string, (bytes, string_types)):
+        stream_or_string = stream_or_string.read()
+    if isinstance(stream_or_string, bytes):
+        stream_or_string = stream_or_string.decode("utf-8")
+    try:
+        objects = json.loads(stream_or_string)
+        for obj in PythonDeserializer(objects, **options):
+            yield obj
+    except (GeneratorExit, DeserializationError):
+        raise
+    except Exception as ex:
+        reraise(DeserializationError, DeserializationError(ex), sys.exc_info()[2])
@@ -1,6 +1,6 @@
 from functools import wraps
 
-from reversion.revisions import create_revision as create_revision_base, set_user, get_user
+from reversion.revisions import create_revision as create_revision_base, set_user, get_user, iscoroutinefunction
 
 
 class _RollBackRevisionView(Exception):
@@ -18,7 +18,8 @@ def _set_user_from_request(request):
         set_user(request.user)
 
 
-def create_revision(manage_manually=False, using=None, atomic=True, request_creates_revision=None):
+def create_revision(manage_manually=False, using=None, atomic=True, request_creates_revision=None,
+                    defer_serialization=False, write_behind=False):
     """
     View decorator that wraps the request in a revision.
 
@@ -27,11 +28,21 @@ def create_revision(manage_manually=False, using=None, atomic=True, request_crea
     request_creates_revision = request_creates_revision or _request_creates_revision
 
     def decorator(func):
+        if iscoroutinefunction(func):
+            from reversion.asyncutils import async_revision_view_decorator
+            return async_revision_view_decorator(
+                lambda: create_revision_base(manage_manually=manage_manually, using=using, atomic=atomic,
+                                             defer_serialization=defer_serialization, write_behind=write_behind),
+                request_creates_revision,
+                func,
+            )
+
         @wraps(func)
         def do_revision_view(request, *args, **kwargs):
             if request_creates_revision(request):
                 try:
-                    with create_revision_base(manage_manually=manage_manually, using=using, atomic=atomic):
+                    with create_revision_base(manage_manually=manage_manually, using=using, atomic=atomic,
+                                              defer_serialization=defer_serialization, write_behind=write_behind):
                         response = func(request, *args, **kwargs)
                         # Check for an error response.
                         if response.status_code >= 400:
@@ -60,14 +71,24 @@ class RevisionMixin(object):
 
     revision_atomic = True
 
+    revision_defer_serialization = False
+
+    revision_write_behind = False
+
     def __init__(self, *args, **kwargs):
         super(RevisionMixin, self).__init__(*args, **kwargs)
+        dispatch = self.dispatch
+        if getattr(self, "view_is_async", False):
+            from reversion.asyncutils import async_dispatch
+            dispatch = async_dispatch(dispatch)
         self.dispatch = create_revision(
             manage_manually=self.revision_manage_manually,
             using=self.revision_using,
             atomic=self.revision_atomic,
-            request_creates_revision=self.revision_request_creates_revision
-        )(self.dispatch)
+            request_creates_revision=self.revision_request_creates_revision,
+            defer_serialization=self.revision_defer_serialization,
+            write_behind=self.revision_write_behind,
+        )(dispatch)
 
     def revision_request_creates_revision(self, request):
         return _request_creates_revision(request)
@@ -0,0 +1,65 @@
+"""
+Shared setup for the benchmark scripts.
+
+The benchmarks use the test project, with a temporary SQLite database unless they need another database. Run them
+from the repository root, e.g. ``python tests/benchmarks/bench_add_to_revision.py``.
+"""
+from __future__ import unicode_literals
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from timeit import default_timer
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.dirname(TESTS_DIR), TESTS_DIR]
+
+
+def setup(database=None):
+    """
+    Configures Django with the test project settings, and creates the database.
+
+    By default, a temporary SQLite database is used. Otherwise, a test database is created on the given database of
+    the test project settings, e.g. "mysql", and destroyed on exit.
+    """
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+    from test_project import settings as test_settings
+    options = {name: getattr(test_settings, name) for name in dir(test_settings) if name.isupper()}
+    options["DEBUG"] = False
+    if database is None:
+        db_dir = tempfile.mkdtemp()
+        atexit.register(shutil.rmtree, db_dir)
+        options["DATABASES"] = {
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": os.path.join(db_dir, "db.sqlite3"),
+                # Wait for other threads' writes to finish, rather than failing.
+                "OPTIONS": {"timeout": 60},
+            },
+        }
+    else:
+        options["DATABASES"] = {
+            "default": test_settings.DATABASES[database],
+        }
+    settings.configure(**options)
+    django.setup()
+    if database is None:
+        call_command("migrate", verbosity=0)
+    else:
+        from django.db import connection
+        name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        atexit.register(connection.creation.destroy_test_db, name, verbosity=0)
+
+
+def best_time(func, repeat=3):
+    """Returns the time in seconds of the fastest of several calls of func."""
+    times = []
+    for _ in range(repeat):
+        start = default_timer()
+        func()
+        times.append(default_timer() - start)
+    return min(times)
@@ -0,0 +1,50 @@
+"""
+Checks that adding N objects to a revision takes time linear in N, with and without nested revision blocks.
+
+The time per object should stay about the same as N grows.
+"""
+from __future__ import print_function, unicode_literals
+from base import setup, best_time
+
+setup()
+
+import reversion  # noqa: E402
+from test_app.models import TestModel  # noqa: E402
+
+
+class _Rollback(Exception):
+    pass
+
+
+def add_to_revision(objs, nested):
+    # Only measure building the revision, not saving it.
+    try:
+        with reversion.create_revision():
+            for obj in objs:
+                if nested:
+                    with reversion.create_revision():
+                        reversion.add_to_revision(obj)
+                else:
+                    reversion.add_to_revision(obj)
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def main():
+    if reversion.is_registered(TestModel):
+        reversion.unregister(TestModel)
+    reversion.register(TestModel, fields=("name",))
+    sizes = (1000, 2000, 4000, 8000)
+    TestModel.objects.bulk_create([TestModel() for _ in range(sizes[-1])])
+    all_objs = list(TestModel.objects.order_by("pk"))
+    print("{:>8} {:>8} {:>10} {:>14}".format("nested", "objects", "seconds", "us per object"))
+    for nested in (False, True):
+        for size in sizes:
+            objs = all_objs[:size]
+            seconds = best_time(lambda: add_to_revision(objs, nested))
+            print("{:>8} {:>8} {:>10.3f} {:>14.1f}".format(str(nested), size, seconds, seconds / size * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Checks that the memory used by get_deleted() on MySQL stays flat as the number of live objects grows.
+
+The number of deleted objects stays the same, so the peak memory of listing them should not grow with the table. Pass
+the name of a database of the test project settings to use it instead, e.g.
+``python tests/benchmarks/bench_get_deleted.py postgres``. Requires Python 3 for tracemalloc.
+"""
+from __future__ import print_function, unicode_literals
+import sys
+import tracemalloc
+from base import setup, best_time
+
+setup(sys.argv[1] if len(sys.argv) > 1 else "mysql")
+
+from django.contrib.contenttypes.models import ContentType  # noqa: E402
+from django.db.models import Max  # noqa: E402
+from django.utils import timezone  # noqa: E402
+import reversion  # noqa: E402
+from reversion.models import Revision, Version  # noqa: E402
+from test_app.models import TestModel  # noqa: E402
+
+
+DELETED = 100
+
+BATCH_SIZE = 1000
+
+
+def add_objects(count):
+    # Create the objects and their versions directly, as only their keys matter here.
+    content_type = ContentType.objects.get_for_model(TestModel)
+    revision = Revision.objects.create(date_created=timezone.now())
+    # Don't reuse the keys of deleted objects.
+    start = (Version.objects.aggregate(max_pk=Max("object_id_int"))["max_pk"] or 0) + 1
+    for i in range(start, start + count, BATCH_SIZE):
+        objs = TestModel.objects.bulk_create([TestModel(pk=pk) for pk in range(i, min(i + BATCH_SIZE, start + count))])
+        Version.objects.bulk_create([
+            Version(
+                revision=revision,
+                object_id=str(obj.pk),
+                object_id_int=obj.pk,
+                content_type=content_type,
+                db="default",
+                format="json",
+                serialized_data="[]",
+                object_repr=str(obj.pk),
+            )
+            for obj
+            in objs
+        ])
+
+
+def get_deleted():
+    return list(Version.objects.get_deleted(TestModel).values_list("pk", flat=True))
+
+
+def peak_memory(func):
+    """Returns the peak memory in bytes allocated by Python during a call of func."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    if reversion.is_registered(TestModel):
+        reversion.unregister(TestModel)
+    reversion.register(TestModel)
+    add_objects(DELETED)
+    TestModel.objects.all().delete()
+    print("{:>10} {:>8} {:>10} {:>14}".format("live", "deleted", "seconds", "peak KiB"))
+    for size in (10000, 20000, 40000, 80000):
+        add_objects(size - TestModel.objects.count())
+        assert len(get_deleted()) == DELETED
+        seconds = best_time(get_deleted)
+        print("{:>10} {:>8} {:>10.3f} {:>14.1f}".format(size, DELETED, seconds, peak_memory(get_deleted) / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares the throughput of write-behind revisions saved in a transaction each with revisions merged by the
+group-commit writer, for many threads creating small revisions concurrently.
+
+Both modes save the revisions on a background thread, as SQLite can't write from several threads at once. SQLite
+can't return primary keys from a multi-row insert either, so revisions are still inserted one at a time there, and
+the speedup is larger on PostgreSQL.
+"""
+from __future__ import print_function, unicode_literals
+from threading import Thread
+from timeit import default_timer
+from base import setup
+
+setup()
+
+from django.db import connection  # noqa: E402
+import reversion  # noqa: E402
+from reversion.models import Revision  # noqa: E402
+from test_app.models import TestModel  # noqa: E402
+
+
+THREADS = 8
+
+REVISIONS_PER_THREAD = 250
+
+OBJECTS_PER_REVISION = 3
+
+
+def create_revisions(objs):
+    try:
+        for _ in range(REVISIONS_PER_THREAD):
+            with reversion.create_revision(write_behind=True):
+                for obj in objs:
+                    reversion.add_to_revision(obj)
+    finally:
+        connection.close()
+
+
+def measure(**options):
+    reversion.configure_write_behind(**options)
+    objs = list(TestModel.objects.all())
+    Revision.objects.all().delete()
+    threads = [
+        Thread(target=create_revisions, args=(objs[i * OBJECTS_PER_REVISION:(i + 1) * OBJECTS_PER_REVISION],))
+        for i in range(THREADS)
+    ]
+    start = default_timer()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    reversion.flush_write_behind()
+    seconds = default_timer() - start
+    assert Revision.objects.count() == THREADS * REVISIONS_PER_THREAD
+    return seconds
+
+
+def main():
+    if reversion.is_registered(TestModel):
+        reversion.unregister(TestModel)
+    reversion.register(TestModel, fields=("name",))
+    TestModel.objects.bulk_create([TestModel() for _ in range(THREADS * OBJECTS_PER_REVISION)])
+    revisions = THREADS * REVISIONS_PER_THREAD
+    print("{} threads, {} revisions of {} objects".format(THREADS, revisions, OBJECTS_PER_REVISION))
+    print("{:>14} {:>10} {:>16}".format("mode", "seconds", "revisions / sec"))
+    times = {}
+    for mode, options in (
+        ("per revision", {"max_workers": 1}),
+        ("group commit", {"group_commit": True}),
+    ):
+        seconds = times[mode] = measure(**options)
+        print("{:>14} {:>10.3f} {:>16.0f}".format(mode, seconds, revisions / seconds))
+    reversion.configure_write_behind()
+    print("speedup: {:.1f}x".format(times["per revision"] / times["group commit"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compares the time taken to serialize a wide model one instance at a time, as versions are captured, using the
+``"json"`` and ``"reversion"`` formats.
+"""
+from __future__ import print_function, unicode_literals
+import uuid
+from datetime import date, time, timedelta
+from base import setup, best_time
+
+setup()
+
+from django.core import serializers  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from test_app.models import TestModelRelated, TestModelWide  # noqa: E402
+
+
+def serialize(format_name, objs, fields):
+    for obj in objs:
+        serializers.serialize(format_name, (obj,), fields=fields)
+
+
+def main():
+    obj_related = TestModelRelated.objects.create()
+    TestModelWide.objects.bulk_create([
+        TestModelWide(
+            date=date(2020, 1, 2),
+            date_time=timezone.now(),
+            time=time(3, 4, 5),
+            duration=timedelta(days=1),
+            uuid=uuid.uuid4(),
+            ip_address="127.0.0.1",
+            binary=b"data",
+            test_model_related=obj_related,
+        )
+        for _ in range(2000)
+    ])
+    objs = list(TestModelWide.objects.all())
+    # Serializing many-to-many fields needs a query per instance, which would hide the difference.
+    fields = [field.name for field in TestModelWide._meta.local_fields]
+    print("{:>10} {:>10} {:>14}".format("format", "seconds", "us per object"))
+    times = {}
+    for format_name in ("json", "reversion"):
+        seconds = times[format_name] = best_time(lambda: serialize(format_name, objs, fields))
+        print("{:>10} {:>10.3f} {:>14.1f}".format(format_name, seconds, seconds / len(objs) * 1e6))
+    print("speedup: {:.1f}x".format(times["json"] / times["reversion"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compares the time of latest-version and object history lookups on a large version table, with and without the
+object index of Version, and checks that the query plan of the latest-version lookup uses the index.
+
+Runs on the postgres database of the test project settings by default. Pass the name of another database, and the
+number of versions, to change them, e.g. ``python tests/benchmarks/bench_version_index.py postgres 10000000``.
+"""
+from __future__ import print_function, unicode_literals
+import random
+import sys
+from base import setup, best_time
+
+setup(sys.argv[1] if len(sys.argv) > 1 else "postgres")
+
+from django.contrib.contenttypes.models import ContentType  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from reversion.models import Revision, Version  # noqa: E402
+from test_app.models import TestModel  # noqa: E402
+
+
+VERSIONS = int(sys.argv[2]) if len(sys.argv) > 2 else 10000000
+
+VERSIONS_PER_OBJECT = 10
+
+LOOKUPS = 1000
+
+BATCH_SIZE = 10000
+
+INDEX_NAME = "reversion_version_object_idx"
+
+
+def add_versions():
+    # Create the versions directly, as only their keys matter here.
+    content_type = ContentType.objects.get_for_model(TestModel)
+    objects = VERSIONS // VERSIONS_PER_OBJECT
+    # Each revision has one version of every object.
+    revisions = [Revision.objects.create(date_created=timezone.now()) for _ in range(VERSIONS_PER_OBJECT)]
+    for i in range(0, VERSIONS, BATCH_SIZE):
+        Version.objects.bulk_create([
+            Version(
+                revision=revisions[n // objects],
+                object_id=str(n % objects),
+                object_id_int=n % objects,
+                content_type=content_type,
+                db="default",
+                format="json",
+                serialized_data="[]",
+                object_repr="",
+            )
+            for n
+            in range(i, min(i + BATCH_SIZE, VERSIONS))
+        ])
+    if connection.vendor in ("postgresql", "sqlite"):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    return objects
+
+
+def latest_versions(object_ids):
+    versions = Version.objects.get_for_model(TestModel)
+    for object_id in object_ids:
+        versions.filter(object_id=object_id).first()
+
+
+def object_histories(object_ids):
+    versions = Version.objects.get_for_model(TestModel)
+    for object_id in object_ids:
+        list(versions.filter(object_id=object_id)[:20])
+
+
+def get_plan(object_id):
+    sql, params = Version.objects.get_for_model(TestModel).filter(object_id=object_id)[:1].query.sql_with_params()
+    explain = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    with connection.cursor() as cursor:
+        cursor.execute(explain + sql, params)
+        return "\n".join(" ".join(str(value) for value in row) for row in cursor.fetchall())
+
+
+def measure(object_ids):
+    return (
+        best_time(lambda: latest_versions(object_ids)) / len(object_ids) * 1e3,
+        best_time(lambda: object_histories(object_ids)) / len(object_ids) * 1e3,
+    )
+
+
+def main():
+    objects = add_versions()
+    object_ids = [str(random.randrange(objects)) for _ in range(LOOKUPS)]
+    # Check that the latest-version lookup uses the index.
+    plan = get_plan(object_ids[0])
+    print(plan)
+    assert INDEX_NAME in plan, "The latest-version lookup doesn't use {}.".format(INDEX_NAME)
+    if connection.vendor == "postgresql":
+        assert "Index Scan" in plan or "Index Only Scan" in plan, "The latest-version lookup doesn't use an index scan."
+    print()
+    print("{:>10} {:>10} {:>18} {:>18}".format("versions", "index", "latest ms/lookup", "history ms/lookup"))
+    print("{:>10} {:>10} {:>18.3f} {:>18.3f}".format(VERSIONS, "yes", *measure(object_ids)))
+    index = next(index for index in Version._meta.indexes if index.name == INDEX_NAME)
+    with connection.schema_editor() as schema_editor:
+        schema_editor.remove_index(Version, index)
+    print("{:>10} {:>10} {:>18.3f} {:>18.3f}".format(VERSIONS, "no", *measure(object_ids)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+from asgiref.sync import sync_to_async
+from reversion.views import create_revision
+from test_app.views import save_obj_view
+
+
+async def save_obj_async_view(request):
+    return await sync_to_async(save_obj_view)(request)
+
+
+@create_revision()
+async def create_revision_async_view(request):
+    return await save_obj_async_view(request)
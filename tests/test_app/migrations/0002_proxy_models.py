@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.2.28 on 2026-10-16 21:07
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestModelInlineProxy',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+            },
+            bases=('test_app.testmodelinline',),
+        ),
+        migrations.CreateModel(
+            name='TestModelProxy',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+            },
+            bases=('test_app.testmodel',),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.2.28 on 2026-10-16 22:30
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0002_proxy_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestModelSymmetrical',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(default='v1', max_length=191)),
+                ('related', models.ManyToManyField(blank=True, related_name='_testmodelsymmetrical_related_+', to='test_app.TestModelSymmetrical')),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.2.28 on 2026-10-16 22:33
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0003_symmetrical_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestModelWide',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(default='v1', max_length=191)),
+                ('text', models.TextField(default='text v1')),
+                ('integer', models.IntegerField(default=1)),
+                ('big_integer', models.BigIntegerField(default=1099511627776)),
+                ('float', models.FloatField(default=1.5)),
+                ('decimal', models.DecimalField(decimal_places=2, default='1.25', max_digits=10)),
+                ('boolean', models.BooleanField(default=True)),
+                ('date', models.DateField(null=True)),
+                ('date_time', models.DateTimeField(null=True)),
+                ('time', models.TimeField(null=True)),
+                ('duration', models.DurationField(null=True)),
+                ('uuid', models.UUIDField(null=True)),
+                ('ip_address', models.GenericIPAddressField(null=True)),
+                ('binary', models.BinaryField(null=True)),
+                ('related', models.ManyToManyField(blank=True, related_name='_testmodelwide_related_+', to='test_app.TestModelRelated')),
+                ('test_model_related', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='test_app.TestModelRelated')),
+            ],
+        ),
+    ]
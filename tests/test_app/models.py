@@ -83,6 +83,100 @@ class TestModelParent(TestModel):
     )
 
 
+class TestModelProxy(TestModel):
+
+    class Meta:
+        proxy = True
+
+
+class TestModelSymmetrical(models.Model):
+
+    name = models.CharField(
+        max_length=191,
+        default="v1",
+    )
+
+    related = models.ManyToManyField(
+        "self",
+        blank=True,
+    )
+
+
+class TestModelWide(models.Model):
+
+    name = models.CharField(
+        max_length=191,
+        default="v1",
+    )
+
+    text = models.TextField(
+        default="text v1",
+    )
+
+    integer = models.IntegerField(
+        default=1,
+    )
+
+    big_integer = models.BigIntegerField(
+        default=2 ** 40,
+    )
+
+    float = models.FloatField(
+        default=1.5,
+    )
+
+    decimal = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default="1.25",
+    )
+
+    boolean = models.BooleanField(
+        default=True,
+    )
+
+    date = models.DateField(
+        null=True,
+    )
+
+    date_time = models.DateTimeField(
+        null=True,
+    )
+
+    time = models.TimeField(
+        null=True,
+    )
+
+    duration = models.DurationField(
+        null=True,
+    )
+
+    uuid = models.UUIDField(
+        null=True,
+    )
+
+    ip_address = models.GenericIPAddressField(
+        null=True,
+    )
+
+    binary = models.BinaryField(
+        null=True,
+    )
+
+    test_model_related = models.ForeignKey(
+        "TestModelRelated",
+        null=True,
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+
+    related = models.ManyToManyField(
+        "TestModelRelated",
+        blank=True,
+        related_name="+",
+    )
+
+
 class TestModelInline(models.Model):
 
     test_model = models.ForeignKey(
@@ -96,6 +190,12 @@ class TestModelInline(models.Model):
     )
 
 
+class TestModelInlineProxy(TestModelInline):
+
+    class Meta:
+        proxy = True
+
+
 class TestModelNestedInline(models.Model):
     test_model_inline = models.ForeignKey(
         TestModelInline,
@@ -6,7 +6,13 @@ from django.urls import clear_url_caches
 from django.test import TestCase, TransactionTestCase
 from django.test.utils import override_settings
 from django.utils import timezone
-from django.utils.six import StringIO, assertRegex
+try:
+    from django.utils.six import StringIO, assertRegex
+except ImportError:  # Django >= 3.0, which only supports Python 3
+    from io import StringIO
+
+    def assertRegex(self, text, regex):
+        return self.assertRegex(text, regex)
 import reversion
 from reversion.models import Revision, Version
 from test_app.models import TestModel, TestModelParent
@@ -23,6 +29,8 @@ class TestBaseMixin(object):
 
     multi_db = True
 
+    databases = "__all__"
+
     def reloadUrls(self):
         reload(import_module(settings.ROOT_URLCONF))
         clear_url_caches()
@@ -1,4 +1,5 @@
 import re
+import django
 from django.contrib import admin
 from django.contrib.contenttypes.admin import GenericTabularInline
 from django.shortcuts import resolve_url
@@ -56,7 +57,8 @@ class AdminUpdateViewTest(LoginMixin, AdminMixin, TestBase):
         })
         self.assertSingleRevision(
             (obj, obj.testmodel_ptr), user=self.user,
-            comment="Changed name and parent_name."
+            # Django >= 3.0 uses the verbose names of the changed fields.
+            comment="Changed Name and Parent name." if django.VERSION >= (3, 0) else "Changed name and parent_name.",
         )
 
 
@@ -1,16 +1,39 @@
 from datetime import timedelta
+from unittest import skipIf
 from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db import connection
+from django.db import transaction
+from django.db.models.signals import post_save
 from django.db.transaction import get_connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from django.utils.encoding import force_text
 import reversion
-from test_app.models import TestModel, TestModelRelated, TestModelThrough, TestModelParent, TestMeta
+from reversion.models import Revision, Version
+from test_app.models import (
+    TestModel, TestModelRelated, TestModelThrough, TestModelParent, TestMeta, TestModelInline,
+    TestModelGenericInline,
+)
 from test_app.tests.base import TestBase, TestBaseTransaction, TestModelMixin, UserMixin
 
 try:
-    from unittest.mock import MagicMock
+    from unittest.mock import MagicMock, patch
 except ImportError:
-    from mock import MagicMock
+    from mock import MagicMock, patch
+try:
+    from asgiref.sync import async_to_sync, sync_to_async
+except ImportError:
+    async_to_sync = sync_to_async = None
+try:
+    from contextvars import Context
+except ImportError:  # Python < 3.7
+    Context = None
+try:
+    import concurrent.futures
+except ImportError:  # Python 2.7 without the futures package
+    concurrent = None
 
 
 class SaveTest(TestModelMixin, TestBase):
@@ -38,6 +61,38 @@ class GetRegisteredModelsTest(TestModelMixin, TestBase):
         self.assertEqual(set(reversion.get_registered_models()), set((TestModel,)))
 
 
+class GetCaptureStatsTest(TestModelMixin, TestBase):
+
+    def testGetCaptureStats(self):
+        with reversion.create_revision():
+            TestModel.objects.create()
+            TestModel.objects.create()
+        stats = reversion.get_capture_stats(TestModel)
+        self.assertEqual(stats.versions, 2)
+        self.assertGreater(stats.serialization_time, 0)
+
+    def testGetCaptureStatsUnregistered(self):
+        with self.assertRaises(reversion.RegistrationError):
+            reversion.get_capture_stats(User)
+
+
+class ContentTypeCacheTest(TestModelMixin, TestBase):
+
+    def testContentTypeCacheCleared(self):
+        with reversion.create_revision():
+            TestModel.objects.create()
+        # Recreate the content type, as a flush does.
+        ContentType.objects.get_for_model(TestModel).delete()
+        ContentType.objects.clear_cache()
+        self.addCleanup(ContentType.objects.clear_cache)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        self.assertEqual(
+            Version.objects.get(object_id=obj.pk).content_type,
+            ContentType.objects.get_for_model(TestModel),
+        )
+
+
 class RegisterTest(TestBase):
 
     def testRegister(self):
@@ -96,6 +151,14 @@ class CreateRevisionTest(TestModelMixin, TestBase):
                 obj = TestModel.objects.create()
         self.assertSingleRevision((obj,))
 
+    def testCreateRevisionNestedOuterObjects(self):
+        with reversion.create_revision():
+            obj_1 = TestModel.objects.create()
+            with reversion.create_revision():
+                obj_2 = TestModel.objects.create()
+            obj_3 = TestModel.objects.create()
+        self.assertSingleRevision((obj_1, obj_2, obj_3))
+
     def testCreateRevisionEmpty(self):
         with reversion.create_revision():
             pass
@@ -130,6 +193,60 @@ class CreateRevisionTest(TestModelMixin, TestBase):
             TestModel.objects.create()
         self.assertEqual(_callback.call_count, 1)
 
+    def testPostRevisionCommitSignalVersionsSaved(self):
+        _callback = MagicMock()
+        reversion.signals.post_revision_commit.connect(_callback)
+
+        with reversion.create_revision():
+            TestModel.objects.create()
+            TestModel.objects.create()
+        versions = _callback.call_args[1]["versions"]
+        self.assertEqual(len(versions), 2)
+        for version in versions:
+            self.assertEqual(Version.objects.get(pk=version.pk), version)
+
+    def testCreateRevisionBulkSave(self):
+        with reversion.create_revision():
+            objs = [TestModel.objects.create() for _ in range(10)]
+        self.assertSingleRevision(objs)
+
+    def testCreateRevisionBulkSaveManyObjects(self):
+        with reversion.create_revision():
+            objs = [TestModel.objects.create() for _ in range(200)]
+        self.assertSingleRevision(objs)
+
+    def testCreateRevisionVersionSignals(self):
+        receiver = MagicMock()
+        post_save.connect(receiver, sender=Version)
+        self.addCleanup(post_save.disconnect, receiver, sender=Version)
+        with reversion.create_revision():
+            objs = [TestModel.objects.create() for _ in range(2)]
+        self.assertSingleRevision(objs)
+        self.assertEqual(receiver.call_count, 2)
+
+
+@skipIf(async_to_sync is None, "asgiref is not installed")
+class CreateRevisionAsyncTest(TestModelMixin, TestBase):
+
+    def testCreateRevisionAsync(self):
+        context = reversion.create_revision()
+        async_to_sync(context.__aenter__)()
+        try:
+            obj = TestModel.objects.create()
+        finally:
+            async_to_sync(context.__aexit__)(None, None, None)
+        self.assertSingleRevision((obj,))
+
+    def testCreateRevisionAsyncDecorator(self):
+        obj = async_to_sync(reversion.create_revision()(sync_to_async(TestModel.objects.create)))()
+        self.assertSingleRevision((obj,))
+
+    @skipIf(Context is None, "contextvars is not available")
+    def testCreateRevisionContextIsolated(self):
+        with reversion.create_revision():
+            self.assertTrue(reversion.is_active())
+            self.assertFalse(Context().run(reversion.is_active))
+
 
 class CreateRevisionAtomicTest(TestModelMixin, TestBaseTransaction):
     def testCreateRevisionAtomic(self):
@@ -143,6 +260,159 @@ class CreateRevisionAtomicTest(TestModelMixin, TestBaseTransaction):
             self.assertFalse(get_connection().in_atomic_block)
 
 
+class CreateRevisionWriteBehindTest(TestModelMixin, TestBaseTransaction):
+
+    def tearDown(self):
+        reversion.configure_write_behind()
+        super(CreateRevisionWriteBehindTest, self).tearDown()
+
+    def skipIfDatabaseNotShared(self):
+        # Without shared cache support (e.g. Python 2.7), each connection to the in-memory SQLite test database sees a
+        # different database, so revisions saved by other threads are invisible to the test.
+        if connection.vendor == "sqlite" and connection.settings_dict["NAME"] == ":memory:":
+            self.skipTest("The in-memory SQLite database is not shared between threads")
+
+    def failRevisionCommit(self, times):
+        failures = []
+
+        def _callback(**kwargs):
+            if len(failures) < times:
+                failures.append(kwargs["revision"])
+                raise Exception("Boom!")
+        reversion.signals.pre_revision_commit.connect(_callback)
+        self.addCleanup(reversion.signals.pre_revision_commit.disconnect, _callback)
+        return failures
+
+    def testCreateRevisionWriteBehind(self):
+        with transaction.atomic():
+            with reversion.create_revision(write_behind=True):
+                obj = TestModel.objects.create()
+            self.assertNoRevision()
+        self.assertSingleRevision((obj,))
+
+    def testCreateRevisionWriteBehindRollback(self):
+        with self.assertRaises(Exception):
+            with transaction.atomic():
+                with reversion.create_revision(write_behind=True):
+                    TestModel.objects.create()
+                raise Exception("Boom!")
+        self.assertNoRevision()
+
+    @skipIf(concurrent is None, "concurrent.futures is not available")
+    def testCreateRevisionWriteBehindExecutor(self):
+        self.skipIfDatabaseNotShared()
+        reversion.configure_write_behind(max_workers=1)
+        with reversion.create_revision(write_behind=True):
+            obj = TestModel.objects.create()
+        reversion.flush_write_behind()
+        self.assertSingleRevision((obj,))
+
+    def testCreateRevisionWriteBehindLog(self):
+        self.failRevisionCommit(1)
+        with patch.object(reversion.revisions.logger, "exception") as log:
+            with reversion.create_revision(write_behind=True):
+                TestModel.objects.create()
+        self.assertEqual(log.call_count, 1)
+        self.assertNoRevision()
+
+    def testCreateRevisionWriteBehindRetry(self):
+        reversion.configure_write_behind(failure_policy="retry", max_retries=1)
+        failures = self.failRevisionCommit(1)
+        with reversion.create_revision(write_behind=True):
+            obj = TestModel.objects.create()
+        self.assertEqual(len(failures), 1)
+        self.assertSingleRevision((obj,))
+
+    @skipIf(concurrent is None, "concurrent.futures is not available")
+    def testCreateRevisionWriteBehindRaise(self):
+        self.skipIfDatabaseNotShared()
+        reversion.configure_write_behind(max_workers=1, failure_policy="raise")
+        self.failRevisionCommit(1)
+        with reversion.create_revision(write_behind=True):
+            TestModel.objects.create()
+        with self.assertRaises(Exception):
+            reversion.flush_write_behind()
+        self.assertNoRevision()
+
+    def testCreateRevisionWriteBehindGroupCommit(self):
+        self.skipIfDatabaseNotShared()
+        reversion.configure_write_behind(group_commit=True, flush_interval=0.05)
+        objs = []
+        for _ in range(3):
+            with reversion.create_revision(write_behind=True):
+                objs.append(TestModel.objects.create())
+        reversion.flush_write_behind()
+        self.assertEqual(Revision.objects.count(), 3)
+        for obj in objs:
+            self.assertSingleRevision((obj,))
+
+    def testCreateRevisionWriteBehindGroupCommitIgnoreDuplicates(self):
+        self.skipIfDatabaseNotShared()
+        reversion.unregister(TestModel)
+        reversion.register(TestModel, ignore_duplicates=True)
+        reversion.configure_write_behind(group_commit=True, flush_interval=0.05)
+        obj = TestModel.objects.create()
+        for _ in range(2):
+            with reversion.create_revision(write_behind=True):
+                obj.save()
+        reversion.flush_write_behind()
+        self.assertSingleRevision((obj,))
+
+    def testCreateRevisionWriteBehindGroupCommitRaise(self):
+        self.skipIfDatabaseNotShared()
+        reversion.configure_write_behind(group_commit=True, failure_policy="raise")
+        self.failRevisionCommit(1)
+        with reversion.create_revision(write_behind=True):
+            TestModel.objects.create()
+        with self.assertRaises(Exception):
+            reversion.flush_write_behind()
+        self.assertNoRevision()
+
+    def testCreateRevisionWriteBehindGroupCommitIsolated(self):
+        self.skipIfDatabaseNotShared()
+        reversion.configure_write_behind(group_commit=True, flush_interval=0.05)
+
+        def _callback(revision, **kwargs):
+            if revision.comment == "Bad":
+                raise Exception("Boom!")
+        reversion.signals.pre_revision_commit.connect(_callback)
+        self.addCleanup(reversion.signals.pre_revision_commit.disconnect, _callback)
+        objs = []
+        for comment in ("Good", "Bad", "Good"):
+            with reversion.create_revision(write_behind=True):
+                reversion.set_comment(comment)
+                objs.append(TestModel.objects.create())
+        with patch.object(reversion.revisions.logger, "exception") as log:
+            reversion.flush_write_behind()
+        self.assertEqual(log.call_count, 1)
+        self.assertEqual(Revision.objects.count(), 2)
+        self.assertSingleRevision((objs[0],), comment="Good")
+        self.assertFalse(Version.objects.get_for_object(objs[1]).exists())
+        self.assertSingleRevision((objs[2],), comment="Good")
+
+    def testConfigureWriteBehindFlushRaise(self):
+        self.skipIfDatabaseNotShared()
+        reversion.configure_write_behind(group_commit=True, failure_policy="raise")
+        self.failRevisionCommit(1)
+        with reversion.create_revision(write_behind=True):
+            TestModel.objects.create()
+        with self.assertRaises(Exception):
+            reversion.configure_write_behind(group_commit=True)
+        # The shut down writer is no longer used.
+        with reversion.create_revision(write_behind=True):
+            obj = TestModel.objects.create()
+        reversion.flush_write_behind()
+        self.assertSingleRevision((obj,))
+
+    def testConfigureWriteBehindGroupCommitThreadPool(self):
+        with self.assertRaises(reversion.RevisionManagementError):
+            reversion.configure_write_behind(max_workers=1, group_commit=True)
+
+    def testConfigureWriteBehindBadFailurePolicy(self):
+        with self.assertRaises(reversion.RevisionManagementError):
+            reversion.configure_write_behind(failure_policy="foo")
+
+
 class CreateRevisionManageManuallyTest(TestModelMixin, TestBase):
 
     def testCreateRevisionManageManually(self):
@@ -167,6 +437,45 @@ class CreateRevisionDbTest(TestModelMixin, TestBase):
         self.assertSingleRevision((obj,), using="postgres")
 
 
+class CreateRevisionDeferSerializationTest(TestModelMixin, TestBase):
+
+    def testCreateRevisionDeferSerialization(self):
+        with reversion.create_revision(defer_serialization=True):
+            obj = TestModel.objects.create()
+            obj.name = "v2"
+            obj.save()
+        self.assertSingleRevision((obj,))
+        self.assertEqual(Version.objects.get_for_object(obj).get().field_dict["name"], "v2")
+
+    def testCreateRevisionDeferSerializationDeleted(self):
+        with reversion.create_revision(defer_serialization=True):
+            obj = TestModel.objects.create()
+            obj.delete()
+        self.assertNoRevision()
+
+    def testCreateRevisionDeferSerializationTextPK(self):
+        obj = TestModel.objects.create()
+        with reversion.create_revision(defer_serialization=True):
+            TestModel(pk=force_text(obj.pk), name="v2").save()
+        self.assertSingleRevision((obj,))
+        self.assertEqual(Version.objects.get_for_object(obj).get().field_dict["name"], "v2")
+
+    def testCreateRevisionDeferSerializationFollow(self):
+        reversion.register(TestModelParent, follow=("testmodel_ptr",))
+        with reversion.create_revision(defer_serialization=True):
+            obj = TestModelParent.objects.create()
+        self.assertSingleRevision((obj, obj.testmodel_ptr))
+
+    def testCreateRevisionDeferSerializationIgnoreDuplicates(self):
+        reversion.unregister(TestModel)
+        reversion.register(TestModel, ignore_duplicates=True)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision(defer_serialization=True):
+            obj.save()
+        self.assertSingleRevision((obj,))
+
+
 class CreateRevisionFollowTest(TestBase):
 
     def testCreateRevisionFollow(self):
@@ -191,6 +500,75 @@ class CreateRevisionFollowTest(TestBase):
             )
         self.assertSingleRevision((obj, obj_through, obj_related))
 
+    def testCreateRevisionFollowGeneric(self):
+        reversion.register(TestModel, follow=("generic_inlines",))
+        reversion.register(TestModelGenericInline)
+        obj = TestModel.objects.create()
+        obj_inline = TestModelGenericInline.objects.create(
+            object_id=obj.pk,
+            content_type=ContentType.objects.get_for_model(obj),
+        )
+        with reversion.create_revision():
+            obj.save()
+        self.assertSingleRevision((obj, obj_inline))
+
+    def testCreateRevisionFollowPrefetched(self):
+        # Serializing m2m fields needs a query per object, so leave them out.
+        reversion.register(TestModel, fields=("name",), follow=("testmodelinline_set", "generic_inlines"))
+        reversion.register(TestModelInline)
+        reversion.register(TestModelGenericInline)
+
+        def create_revision_queries(count):
+            objs = [TestModel.objects.create() for _ in range(count)]
+            for obj in objs:
+                TestModelInline.objects.create(test_model=obj)
+                TestModelGenericInline.objects.create(
+                    object_id=obj.pk,
+                    content_type=ContentType.objects.get_for_model(obj),
+                )
+            with CaptureQueriesContext(connection) as queries:
+                with reversion.create_revision(defer_serialization=True):
+                    for obj in objs:
+                        reversion.add_to_revision(obj)
+            return len(queries)
+
+        # Warm up the content type cache.
+        create_revision_queries(1)
+        self.assertEqual(create_revision_queries(2), create_revision_queries(4))
+
+    def testCreateRevisionFollowPrefetchedSaves(self):
+        reversion.register(TestModel, fields=("name",), follow=("testmodelinline_set",))
+        reversion.register(TestModelInline)
+
+        def create_revision_queries(count, defer_serialization):
+            objs = [TestModel.objects.create() for _ in range(count)]
+            for obj in objs:
+                TestModelInline.objects.create(test_model=obj)
+            with CaptureQueriesContext(connection) as queries:
+                with reversion.create_revision(defer_serialization=defer_serialization):
+                    for obj in objs:
+                        obj.save()
+            # Leave out the saves themselves.
+            return len(queries) - count
+
+        # Warm up the content type cache.
+        create_revision_queries(1, False)
+        # Each saved object loads its followed relations when it is saved.
+        self.assertEqual(
+            create_revision_queries(4, False) - create_revision_queries(2, False),
+            2 * (create_revision_queries(2, False) - create_revision_queries(1, False)),
+        )
+        # Deferred serialization loads the followed relations of all saved objects together.
+        self.assertEqual(create_revision_queries(2, True), create_revision_queries(4, True))
+
+    def testCreateRevisionFollowPrefetchedNotCached(self):
+        reversion.register(TestModel, follow=("testmodelinline_set",))
+        reversion.register(TestModelInline)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        obj_inline = TestModelInline.objects.create(test_model=obj)
+        self.assertEqual(list(obj.testmodelinline_set.all()), [obj_inline])
+
     def testCreateRevisionFollowInvalid(self):
         reversion.register(TestModel, follow=("name",))
         with reversion.create_revision():
@@ -208,6 +586,51 @@ class CreateRevisionIgnoreDuplicatesTest(TestBase):
             obj.save()
         self.assertSingleRevision((obj,))
 
+    def testCreateRevisionIgnoreDuplicatesChanged(self):
+        reversion.register(TestModel, ignore_duplicates=True)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.name = "v2"
+            obj.save()
+        self.assertEqual(Version.objects.get_for_object(obj).count(), 2)
+
+    def testCreateRevisionIgnoreDuplicatesBatched(self):
+        reversion.register(TestModel, ignore_duplicates=True)
+        with reversion.create_revision():
+            objs = [TestModel.objects.create() for _ in range(5)]
+        with reversion.create_revision():
+            for obj in objs:
+                obj.save()
+            objs[0].name = "v2"
+            objs[0].save()
+        self.assertEqual(Revision.objects.count(), 2)
+        self.assertEqual(Version.objects.get_for_model(TestModel).count(), 6)
+
+    def testCreateRevisionIgnoreDuplicatesFollow(self):
+        reversion.register(TestModel, ignore_duplicates=True, follow=("testmodelinline_set",))
+        reversion.register(TestModelInline)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+            obj_inline = TestModelInline.objects.create(test_model=obj)
+        with reversion.create_revision():
+            obj.save()
+        self.assertSingleRevision((obj, obj_inline))
+        self.assertEqual(Revision.objects.count(), 1)
+        self.assertEqual(Version.objects.get_for_object(obj_inline).count(), 1)
+
+    def testCreateRevisionIgnoreDuplicatesFollowChanged(self):
+        reversion.register(TestModel, ignore_duplicates=True, follow=("testmodelinline_set",))
+        reversion.register(TestModelInline)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+            obj_inline = TestModelInline.objects.create(test_model=obj)
+        with reversion.create_revision():
+            obj.name = "v2"
+            obj.save()
+        self.assertEqual(Revision.objects.count(), 2)
+        self.assertEqual(Version.objects.get_for_object(obj_inline).count(), 2)
+
 
 class CreateRevisionInheritanceTest(TestModelMixin, TestBase):
 
@@ -315,6 +738,21 @@ class AddMetaTest(TestModelMixin, TestBase):
             obj = TestModel.objects.create()
         self.assertSingleRevision((obj,), meta_names=("meta v1",))
 
+    def testAddMetaSignals(self):
+        receiver = MagicMock()
+        post_save.connect(receiver, sender=TestMeta)
+        self.addCleanup(post_save.disconnect, receiver, sender=TestMeta)
+        with reversion.create_revision():
+            reversion.add_meta(TestMeta, name="meta v1")
+            obj = TestModel.objects.create()
+        self.assertSingleRevision((obj,), meta_names=("meta v1",))
+        self.assertEqual(receiver.call_count, 1)
+        self.assertEqual(receiver.call_args[1]["instance"].name, "meta v1")
+
+    def testAddMetaInheritance(self):
+        self.assertTrue(reversion.revisions._can_bulk_create_model(TestMeta))
+        self.assertFalse(reversion.revisions._can_bulk_create_model(TestModelParent))
+
     def testAddMetaNoBlock(self):
         with self.assertRaises(reversion.RevisionManagementError):
             reversion.add_meta(TestMeta, name="meta v1")
@@ -326,3 +764,11 @@ class AddMetaTest(TestModelMixin, TestBase):
         self.assertNoRevision()
         self.assertSingleRevision((obj,), meta_names=("meta v1",), using="mysql")
         self.assertSingleRevision((obj,), meta_names=("meta v1",), using="postgres")
+
+    def testAddMetaNested(self):
+        with reversion.create_revision():
+            reversion.add_meta(TestMeta, name="meta v1")
+            with reversion.create_revision():
+                reversion.add_meta(TestMeta, name="meta v2")
+                obj = TestModel.objects.create()
+        self.assertSingleRevision((obj,), meta_names=("meta v1", "meta v2"))
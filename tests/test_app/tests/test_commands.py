@@ -1,11 +1,19 @@
 import json
 from datetime import timedelta
 from django.core.management import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 import reversion
+from reversion.models import Version, VersionBlob, VersionHead, VersionHeadStatus, _get_content_hash
 from test_app.models import TestModel
 from test_app.tests.base import TestBase, TestModelMixin
 
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
 
 class CreateInitialRevisionsTest(TestModelMixin, TestBase):
 
@@ -65,6 +73,15 @@ class CreateInitialRevisionsDbTest(TestModelMixin, TestBase):
         self.assertNoRevision()
         self.assertSingleRevision((obj,), comment="Initial version.", using="mysql")
 
+    def testCreateInitialRevisionsDbAlreadyCreated(self):
+        objs = [TestModel.objects.create() for _ in range(3)]
+        with reversion.create_revision(using="postgres"):
+            objs[1].save()
+        self.callCommand("createinitialrevisions", using="postgres", batch_size=1)
+        self.callCommand("createinitialrevisions", using="postgres", batch_size=1)
+        for obj in objs:
+            self.assertEqual(Version.objects.using("postgres").get_for_object(obj).count(), 1)
+
 
 class CreateInitialRevisionsModelDbTest(TestModelMixin, TestBase):
 
@@ -203,3 +220,174 @@ class DeleteRevisionsKeepTest(TestModelMixin, TestBase):
         self.assertSingleRevision((obj_1,), comment="obj_1 v2")
         self.assertSingleRevision((obj_2,), comment="obj_2 v2")
         self.assertSingleRevision((obj_3,))
+
+
+class CreateContentHashesTest(TestModelMixin, TestBase):
+
+    def testCreateContentHashes(self):
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        Version.objects.update(content_hash=None)
+        self.callCommand("createcontenthashes", batch_size=1)
+        version = Version.objects.get_for_object(obj).get()
+        self.assertEqual(version.content_hash, _get_content_hash(version.serialized_data))
+
+    def testCreateContentHashesDb(self):
+        with reversion.create_revision(using="postgres"):
+            obj = TestModel.objects.create()
+        Version.objects.using("postgres").update(content_hash=None)
+        self.callCommand("createcontenthashes", using="postgres")
+        version = Version.objects.using("postgres").get_for_object(obj).get()
+        self.assertEqual(version.content_hash, _get_content_hash(version.serialized_data))
+
+    def testCreateContentHashesStorage(self):
+        reversion.unregister(TestModel)
+        reversion.register(TestModel, blob_storage=True, keyframe_interval=10)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        for name in ("v2", "v3"):
+            with reversion.create_revision():
+                obj.name = name
+                obj.save()
+        Version.objects.update(content_hash=None)
+        # The versions are counted, then loaded with their blobs and keyframes in one query per batch.
+        with patch("reversion.management.commands.createcontenthashes.reset_queries"), \
+                CaptureQueriesContext(connection) as queries:
+            self.callCommand("createcontenthashes", batch_size=3)
+        self.assertEqual(len([query for query in queries if query["sql"].startswith("SELECT")]), 3)
+        for version in Version.objects.get_for_object(obj):
+            self.assertEqual(version.content_hash, _get_content_hash(version._get_serialized_data()))
+
+
+class CreateObjectIdIntsTest(TestModelMixin, TestBase):
+
+    def testCreateObjectIdInts(self):
+        with reversion.create_revision():
+            obj_1 = TestModel.objects.create()
+            obj_2 = TestModel.objects.create()
+        Version.objects.update(object_id_int=None)
+        self.callCommand("createobjectidints", batch_size=1)
+        self.assertEqual(Version.objects.get_for_object(obj_1).get().object_id_int, obj_1.pk)
+        self.assertEqual(Version.objects.get_for_object(obj_2).get().object_id_int, obj_2.pk)
+
+    def testCreateObjectIdIntsDb(self):
+        with reversion.create_revision(using="postgres"):
+            obj = TestModel.objects.create()
+        Version.objects.using("postgres").update(object_id_int=None)
+        self.callCommand("createobjectidints", using="postgres")
+        self.assertEqual(Version.objects.using("postgres").get_for_object(obj).get().object_id_int, obj.pk)
+
+
+class CompressVersionsTest(TestBase):
+
+    def testCompressVersions(self):
+        reversion.register(TestModel)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        reversion.unregister(TestModel)
+        reversion.register(TestModel, compression="zlib")
+        self.callCommand("compressversions", batch_size=1)
+        version = Version.objects.get_for_object(obj).get()
+        self.assertEqual(version.compression, "zlib")
+        self.assertEqual(version.field_dict["name"], "v1")
+        self.assertEqual(version.content_hash, _get_content_hash(version._get_serialized_data()))
+
+    def testCompressVersionsBlobs(self):
+        reversion.register(TestModel, blob_storage=True)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        reversion.unregister(TestModel)
+        reversion.register(TestModel, compression="zlib", blob_storage=True)
+        self.callCommand("compressversions")
+        version = Version.objects.get_for_object(obj).get()
+        self.assertEqual(version.compression, "")
+        self.assertEqual(version.field_dict["name"], "v1")
+
+    def testCompressVersionsUncompressedModel(self):
+        reversion.register(TestModel)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        self.callCommand("compressversions")
+        self.assertEqual(Version.objects.get_for_object(obj).get().compression, "")
+
+
+class CreateVersionBlobsTest(TestBase):
+
+    def testCreateVersionBlobs(self):
+        reversion.register(TestModel)
+        obj = TestModel.objects.create()
+        for _ in range(2):
+            with reversion.create_revision():
+                obj.save()
+        reversion.unregister(TestModel)
+        reversion.register(TestModel, blob_storage=True)
+        self.callCommand("createversionblobs", batch_size=1)
+        self.assertEqual(VersionBlob.objects.count(), 1)
+        for version in Version.objects.get_for_object(obj):
+            self.assertEqual(version.serialized_data, "")
+            self.assertEqual(version.field_dict["name"], "v1")
+
+
+class DeleteRevisionsBlobsTest(TestBase):
+
+    def testDeleteRevisionsBlobs(self):
+        reversion.register(TestModel, blob_storage=True)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.name = "v2"
+            obj.save()
+        self.assertEqual(VersionBlob.objects.count(), 2)
+        self.callCommand("deleterevisions", keep=1)
+        self.assertEqual(VersionBlob.objects.count(), 1)
+        self.assertEqual(Version.objects.get_for_object(obj).get().field_dict["name"], "v2")
+
+
+class DeleteRevisionsHeadsTest(TestBase):
+
+    def testDeleteRevisionsHeads(self):
+        reversion.register(TestModel, track_heads=True)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.save()
+        version = Version.objects.get_for_object(obj).last()
+        Version.objects.get_for_object(obj).first().revision.delete()
+        self.callCommand("deleterevisions", days=1)
+        self.assertEqual(VersionHead.objects.get().version, version)
+
+    def testDeleteRevisionsHeadsAll(self):
+        reversion.register(TestModel, track_heads=True)
+        with reversion.create_revision():
+            TestModel.objects.create()
+        self.callCommand("deleterevisions")
+        self.assertEqual(VersionHead.objects.count(), 0)
+
+
+class RebuildVersionHeadsTest(TestBase):
+
+    def testRebuildVersionHeads(self):
+        reversion.register(TestModel)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.save()
+        reversion.unregister(TestModel)
+        reversion.register(TestModel, track_heads=True)
+        self.callCommand("rebuildversionheads", batch_size=1)
+        self.assertEqual(VersionHead.objects.get().version, Version.objects.get_for_object(obj).first())
+
+    def testRebuildVersionHeadsGetDeleted(self):
+        reversion.register(TestModel)
+        with reversion.create_revision():
+            obj_1 = TestModel.objects.create()
+        reversion.unregister(TestModel)
+        reversion.register(TestModel, track_heads=True)
+        with reversion.create_revision():
+            obj_2 = TestModel.objects.create()
+        obj_1.delete()
+        obj_2.delete()
+        self.assertFalse(VersionHeadStatus.objects.exists())
+        self.callCommand("rebuildversionheads")
+        self.assertEqual(VersionHeadStatus.objects.count(), 1)
+        self.assertEqual(Version.objects.get_deleted(TestModel).count(), 2)
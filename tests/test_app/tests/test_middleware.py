@@ -1,7 +1,25 @@
+from unittest import skipIf
 from django.conf import settings
+from django.test import RequestFactory
 from django.test.utils import override_settings
+from reversion.middleware import RevisionMiddleware
+from reversion.revisions import iscoroutinefunction
 from test_app.models import TestModel
 from test_app.tests.base import TestBase, TestModelMixin, LoginMixin
+from test_app.views import save_obj_view
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+try:
+    from asgiref.sync import async_to_sync, sync_to_async
+except ImportError:  # pragma: no cover
+    async_to_sync = sync_to_async = None
+try:
+    from django.test import AsyncClient
+except ImportError:  # Django < 3.1
+    AsyncClient = None
 
 
 use_middleware = override_settings(
@@ -28,6 +46,46 @@ class RevisionMiddlewareTest(TestModelMixin, TestBase):
         self.assertNoRevision()
 
 
+@skipIf(async_to_sync is None, "asgiref is not installed")
+class RevisionMiddlewareAsyncTest(TestModelMixin, TestBase):
+
+    def testCreateRevisionAsync(self):
+        middleware = RevisionMiddleware(sync_to_async(save_obj_view))
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(RequestFactory().post("/"))
+        obj = TestModel.objects.get(pk=response.content)
+        self.assertSingleRevision((obj,))
+
+    def testCreateRevisionSync(self):
+        middleware = RevisionMiddleware(save_obj_view)
+        self.assertFalse(iscoroutinefunction(middleware))
+        response = middleware(RequestFactory().post("/"))
+        obj = TestModel.objects.get(pk=response.content)
+        self.assertSingleRevision((obj,))
+
+
+@skipIf(AsyncClient is None, "Django < 3.1 does not support async views")
+@use_middleware
+class RevisionMiddlewareAsyncClientTest(TestModelMixin, TestBase):
+
+    def testCreateRevision(self):
+        import reversion.asyncutils
+        with patch.object(
+            reversion.asyncutils,
+            "async_revision_view_decorator",
+            wraps=reversion.asyncutils.async_revision_view_decorator,
+        ) as async_revision_view_decorator:
+            response = async_to_sync(AsyncClient().post)("/test-app/save-obj-async/")
+        # The middleware was used in an async chain.
+        self.assertEqual(async_revision_view_decorator.call_count, 1)
+        obj = TestModel.objects.get(pk=response.content)
+        self.assertSingleRevision((obj,))
+
+    def testCreateRevisionGet(self):
+        async_to_sync(AsyncClient().get)("/test-app/save-obj-async/")
+        self.assertNoRevision()
+
+
 @use_middleware
 class RevisionMiddlewareUserTest(TestModelMixin, LoginMixin, TestBase):
 
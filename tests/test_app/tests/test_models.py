@@ -1,12 +1,31 @@
+import json
+import sqlite3
+import uuid
+from datetime import date, time, timedelta
+from django.contrib.contenttypes.models import ContentType
+from django.core import serializers
+from django.core.management import CommandError
+from django.db import connection, connections, models
+from django.utils import timezone
 from django.utils.encoding import force_text
 import reversion
-from reversion.models import Version
+from reversion.compression import ZlibCodec
+from reversion.models import (
+    Version, VersionBlob, VersionHead, VersionHeadStatus, VersionQuerySet, _can_subquery, _get_content_hash,
+    _get_object_id_join_sql, _has_unique_constraints, _iter_join_chunks, _safe_subquery, _sort_models,
+)
 from test_app.models import (
     TestModel, TestModelRelated, TestModelParent, TestModelInline,
-    TestModelNestedInline,
+    TestModelNestedInline, TestModelEscapePK, TestModelProxy, TestModelInlineProxy, TestModelSymmetrical,
+    TestModelWide,
 )
 from test_app.tests.base import TestBase, TestModelMixin, TestModelParentMixin
 
+try:
+    from unittest.mock import MagicMock, patch
+except ImportError:
+    from mock import MagicMock, patch
+
 
 class GetForModelTest(TestModelMixin, TestBase):
 
@@ -99,6 +118,78 @@ class GetForObjectUniqueTest(TestModelMixin, TestBase):
             obj.save()
         self.assertEqual(len(list(Version.objects.get_for_object(obj).get_unique())), 2)
 
+    def enableWindowFunctions(self):
+        # Django < 2.0 has no window functions.
+        if not hasattr(models, "Window"):
+            self.skipTest("Django does not support window functions.")
+        # SQLite supports window functions from 3.25, before Django detects them.
+        if connection.vendor == "sqlite" and connection.Database.sqlite_version_info >= (3, 25, 0):
+            patcher = patch.object(connection.features, "supports_over_clause", True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        if not getattr(connection.features, "supports_over_clause", False):
+            self.skipTest("Database does not support window functions.")
+
+    def testGetForObjectUniqueQuerySet(self):
+        self.enableWindowFunctions()
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.save()
+        with reversion.create_revision():
+            obj.name = "v2"
+            obj.save()
+        unique_versions = Version.objects.get_for_object(obj).get_unique()
+        self.assertEqual(next(unique_versions).field_dict["name"], "v2")
+        self.assertEqual(next(unique_versions).field_dict["name"], "v1")
+        self.assertEqual(list(unique_versions), [])
+
+    def testGetForObjectUniqueAscending(self):
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.save()
+        with reversion.create_revision():
+            obj.name = "v2"
+            obj.save()
+        with reversion.create_revision():
+            obj.save()
+        versions = Version.objects.get_for_object(obj).order_by("pk")
+        iterator_pks = [version.pk for version in versions._get_unique_iterator()]
+        self.enableWindowFunctions()
+        window_pks = [version.pk for version in versions.get_unique()]
+        self.assertEqual(window_pks, iterator_pks)
+        self.assertEqual(len(window_pks), 2)
+
+    def testGetForObjectUniqueSliced(self):
+        self.enableWindowFunctions()
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.save()
+        with reversion.create_revision():
+            obj.name = "v2"
+            obj.save()
+        unique_versions = list(Version.objects.get_for_object(obj)[:2].get_unique())
+        self.assertEqual(len(unique_versions), 2)
+        self.assertEqual(unique_versions[0].field_dict["name"], "v2")
+
+    def testGetForObjectUniqueNoContentHash(self):
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.save()
+        Version.objects.update(content_hash=None)
+        self.assertEqual(len(list(Version.objects.get_for_object(obj).get_unique())), 1)
+
+    def testGetForObjectUniqueContentHash(self):
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.save()
+        Version.objects.update(serialized_data="boom")
+        self.assertEqual(len(list(Version.objects.get_for_object(obj).get_unique())), 1)
+
 
 class GetForObjectReferenceTest(TestModelMixin, TestBase):
 
@@ -197,6 +288,54 @@ class GetDeletedTest(TestModelMixin, TestBase):
         self.assertEqual(Version.objects.using("mysql").get_deleted(TestModel, model_db="mysql").count(), 1)
 
 
+class GetDeletedMySQLJoinTest(TestBase):
+
+    def getJoinSQL(self, model):
+        connection = MagicMock(vendor="mysql")
+        connection.ops.quote_name = lambda name: "`{}`".format(name)
+        return _get_object_id_join_sql(connection, model, "V")
+
+    def testGetDeletedMySQLJoin(self):
+        self.assertEqual(
+            self.getJoinSQL(TestModel),
+            "`test_app_testmodel`.`id` = CAST(V.`object_id` AS SIGNED)",
+        )
+
+    def testGetDeletedMySQLJoinInheritance(self):
+        self.assertEqual(
+            self.getJoinSQL(TestModelParent),
+            "`test_app_testmodelparent`.`testmodel_ptr_id` = CAST(V.`object_id` AS SIGNED)",
+        )
+
+    def testGetDeletedMySQLJoinStringPK(self):
+        self.assertIsNone(self.getJoinSQL(TestModelEscapePK))
+
+
+class ObjectIdIntTest(TestBase):
+
+    def testObjectIdInt(self):
+        reversion.register(TestModel)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        self.assertEqual(Version.objects.get_for_object(obj).get().object_id_int, obj.pk)
+
+    def testObjectIdIntStringPK(self):
+        reversion.register(TestModelEscapePK)
+        with reversion.create_revision():
+            obj = TestModelEscapePK.objects.create(name="obj")
+        self.assertIsNone(Version.objects.get_for_object(obj).get().object_id_int)
+
+    def testGetDeletedObjectIdIntMissing(self):
+        reversion.register(TestModel)
+        with reversion.create_revision():
+            obj_1 = TestModel.objects.create()
+            obj_2 = TestModel.objects.create()
+        Version.objects.get_for_object(obj_1).update(object_id_int=None)
+        obj_1.delete()
+        obj_2.delete()
+        self.assertEqual(Version.objects.get_deleted(TestModel).count(), 2)
+
+
 class GetDeletedDbTest(TestModelMixin, TestBase):
 
     def testGetDeletedDb(self):
@@ -214,6 +353,32 @@ class GetDeletedDbTest(TestModelMixin, TestBase):
         self.assertEqual(Version.objects.using("mysql").get_deleted(TestModel).count(), 1)
 
 
+class IterJoinChunksTest(TestModelMixin, TestBase):
+
+    def setUp(self):
+        super(IterJoinChunksTest, self).setUp()
+        self.objs = [TestModel.objects.create() for _ in range(3)]
+        with reversion.create_revision(using="postgres"):
+            self.objs[0].save()
+            self.objs[2].save()
+
+    def iterJoinChunks(self, method):
+        return list(_iter_join_chunks(
+            method,
+            TestModel.objects.all(),
+            "id",
+            Version.objects.using("postgres").get_for_model(TestModel),
+            "object_id",
+            chunk_size=1,
+        ))
+
+    def testIterJoinChunksFilter(self):
+        self.assertEqual(self.iterJoinChunks("filter"), [[self.objs[0].pk], [self.objs[2].pk]])
+
+    def testIterJoinChunksExclude(self):
+        self.assertEqual(self.iterJoinChunks("exclude"), [[self.objs[1].pk]])
+
+
 class GetDeletedModelDbTest(TestModelMixin, TestBase):
 
     def testGetDeletedModelDb(self):
@@ -224,6 +389,199 @@ class GetDeletedModelDbTest(TestModelMixin, TestBase):
         self.assertEqual(Version.objects.get_deleted(TestModel, model_db="postgres").count(), 1)
 
 
+class GetDeletedQueryParamsTest(TestModelMixin, TestBase):
+
+    def limitQueryParams(self):
+        for using in ("default", "postgres"):
+            connection = connections[using]
+            connection.ensure_connection()
+            if not hasattr(connection.connection, "setlimit"):
+                self.skipTest("Requires sqlite3.Connection.setlimit")
+            # Limit the number of query parameters, on both the database and in Django.
+            limit = connection.connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 100)
+            self.addCleanup(connection.connection.setlimit, sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+            patcher = patch.object(connection.features, "max_query_params", 100, create=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def testGetDeletedQueryParams(self):
+        with reversion.create_revision(using="postgres"):
+            objs = [TestModel.objects.create() for _ in range(150)]
+        TestModel.objects.all().delete()
+        self.limitQueryParams()
+        deleted = Version.objects.using("postgres").get_deleted(TestModel, model_db="default")
+        self.assertEqual(deleted.count(), 150)
+        self.assertEqual(
+            set(deleted.values_list("object_id", flat=True)),
+            set(force_text(obj.pk) for obj in objs),
+        )
+
+    def testGetDeletedLazy(self):
+        with reversion.create_revision(using="postgres"):
+            obj = TestModel.objects.create()
+        obj.delete()
+        tables = connections["postgres"].introspection.table_names()
+        # The live objects aren't looked up until the queryset is evaluated.
+        with self.assertNumQueries(0):
+            deleted = Version.objects.using("postgres").get_deleted(TestModel, model_db="default")
+        self.assertEqual(deleted.count(), 1)
+        self.assertEqual(list(deleted), [Version.objects.using("postgres").get()])
+        self.assertEqual(connections["postgres"].introspection.table_names(), tables)
+
+    def testGetDeletedMaxInListSize(self):
+        with reversion.create_revision(using="postgres"):
+            objs = [TestModel.objects.create() for _ in range(5)]
+        TestModel.objects.all().delete()
+        deleted = Version.objects.using("postgres").get_deleted(TestModel, model_db="default")
+        with patch.object(connections["postgres"].ops, "max_in_list_size", return_value=2):
+            self.assertEqual(
+                set(deleted.values_list("object_id", flat=True)),
+                set(force_text(obj.pk) for obj in objs),
+            )
+
+    def testGetDeletedSubquery(self):
+        with reversion.create_revision():
+            objs = [TestModel.objects.create() for _ in range(3)]
+        object_id = force_text(objs[0].pk)
+        objs[0].delete()
+        with patch("reversion.models._get_object_id_join_sql", return_value=None):
+            self.assertEqual(
+                list(Version.objects.get_deleted(TestModel).values_list("object_id", flat=True)),
+                [object_id],
+            )
+
+    def testSafeSubqueryQueryParams(self):
+        reversion.register(TestModelEscapePK)
+        objs = [TestModelEscapePK.objects.create(name="obj{}".format(i)) for i in range(150)]
+        with reversion.create_revision():
+            objs[0].save()
+        self.limitQueryParams()
+        self.assertTrue(_can_subquery(
+            TestModelEscapePK.objects.all(),
+            "name",
+            Version.objects.get_for_model(TestModelEscapePK),
+            "object_id",
+        ))
+        unversioned = _safe_subquery(
+            "exclude",
+            TestModelEscapePK.objects.all(),
+            "name",
+            Version.objects.get_for_model(TestModelEscapePK),
+            "object_id",
+        )
+        self.assertEqual(set(unversioned.values_list("pk", flat=True)), set(obj.pk for obj in objs[1:]))
+
+    def testCanSubqueryModelDb(self):
+        self.assertFalse(_can_subquery(
+            TestModel.objects.all(),
+            "id",
+            Version.objects.using("postgres").get_for_model(TestModel),
+            "object_id",
+        ))
+
+
+class VersionHeadTest(TestBase):
+
+    def setUp(self):
+        super(VersionHeadTest, self).setUp()
+        reversion.register(TestModel, track_heads=True)
+
+    def testVersionHead(self):
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.save()
+        self.assertEqual(VersionHead.objects.get().version, Version.objects.get_for_object(obj).first())
+
+    def testVersionHeadGetDeleted(self):
+        with reversion.create_revision():
+            obj_1 = TestModel.objects.create()
+        with reversion.create_revision():
+            obj_1.save()
+            TestModel.objects.create()
+        version = Version.objects.get_for_object(obj_1).first()
+        obj_1.delete()
+        self.assertEqual(list(Version.objects.get_deleted(TestModel)), [version])
+
+    def testVersionHeadGetDeletedModelDb(self):
+        with reversion.create_revision():
+            obj = TestModel.objects.db_manager("postgres").create()
+        obj.delete()
+        self.assertEqual(Version.objects.get_deleted(TestModel).count(), 0)
+        self.assertEqual(Version.objects.get_deleted(TestModel, model_db="postgres").count(), 1)
+
+    def testVersionHeadGetDeletedRepair(self):
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.save()
+        Version.objects.get_for_object(obj).first().revision.delete()
+        self.assertEqual(VersionHead.objects.get().version, None)
+        obj.delete()
+        self.assertEqual(list(Version.objects.get_deleted(TestModel)), [Version.objects.get()])
+
+    def testVersionHeadGetDeletedMissingHeads(self):
+        reversion.unregister(TestModel)
+        reversion.register(TestModel)
+        with reversion.create_revision():
+            obj_1 = TestModel.objects.create()
+        reversion.unregister(TestModel)
+        reversion.register(TestModel, track_heads=True)
+        with reversion.create_revision():
+            obj_2 = TestModel.objects.create()
+        obj_1.delete()
+        obj_2.delete()
+        self.assertEqual(VersionHead.objects.count(), 1)
+        self.assertFalse(VersionHeadStatus.objects.exists())
+        self.assertEqual(Version.objects.get_deleted(TestModel).count(), 2)
+
+    def testVersionHeadStatus(self):
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        self.assertEqual(VersionHeadStatus.objects.get().content_type, ContentType.objects.get_for_model(TestModel))
+        obj.delete()
+        # Complete heads are used without aggregating the versions.
+        with patch.object(VersionQuerySet, "_get_deleted_heads", autospec=True,
+                          side_effect=VersionQuerySet._get_deleted_heads) as get_deleted_heads:
+            self.assertEqual(Version.objects.get_deleted(TestModel).count(), 1)
+        self.assertEqual(get_deleted_heads.call_count, 1)
+
+    def testVersionHeadManyObjects(self):
+        connection = connections["default"]
+        connection.ensure_connection()
+        if not hasattr(connection.connection, "setlimit"):
+            self.skipTest("Requires sqlite3.Connection.setlimit")
+        limit = connection.connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 100)
+        self.addCleanup(connection.connection.setlimit, sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+        patcher = patch.object(connection.features, "max_query_params", 100)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with reversion.create_revision():
+            for _ in range(30):
+                TestModel.objects.create()
+        self.assertEqual(VersionHead.objects.count(), 30)
+
+    def testVersionHeadIgnoreDuplicates(self):
+        reversion.unregister(TestModel)
+        reversion.register(TestModel, track_heads=True, ignore_duplicates=True)
+        obj = TestModel.objects.create()
+        for _ in range(2):
+            with reversion.create_revision():
+                obj.save()
+        self.assertSingleRevision((obj,))
+
+    def testVersionHeadIgnoreDuplicatesMissingHeads(self):
+        reversion.unregister(TestModel)
+        reversion.register(TestModel)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        reversion.unregister(TestModel)
+        reversion.register(TestModel, track_heads=True, ignore_duplicates=True)
+        with reversion.create_revision():
+            obj.save()
+        self.assertSingleRevision((obj,))
+
+
 class FieldDictTest(TestModelMixin, TestBase):
 
     def testFieldDict(self):
@@ -257,6 +615,14 @@ class FieldDictFieldsTest(TestBase):
             "name": "v1",
         })
 
+    def testFieldDictFieldFieldsUnknown(self):
+        reversion.register(TestModel, fields=("name", "unknown"))
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        self.assertEqual(Version.objects.get_for_object(obj).get().field_dict, {
+            "name": "v1",
+        })
+
 
 class FieldDictExcludeTest(TestBase):
 
@@ -297,6 +663,43 @@ class FieldDictInheritanceTest(TestModelParentMixin, TestBase):
             "testmodel_ptr_id": obj.pk,
         })
 
+    def testPrefetchFieldDicts(self):
+        for i in range(3):
+            with reversion.create_revision():
+                TestModelParent.objects.create(name="v{}".format(i), parent_name="parent v{}".format(i))
+        versions = Version.objects.get_for_model(TestModelParent)
+        list(versions)
+        with self.assertNumQueries(2):
+            versions = list(versions.prefetch_field_dicts())
+        with self.assertNumQueries(0):
+            field_dicts = [version.field_dict for version in versions]
+        self.assertEqual(field_dicts, [
+            version.field_dict
+            for version
+            in Version.objects.get_for_model(TestModelParent)
+        ])
+        self.assertEqual([field_dict["name"] for field_dict in field_dicts], ["v2", "v1", "v0"])
+
+    def testPrefetchFieldDictsChunked(self):
+        for i in range(3):
+            with reversion.create_revision():
+                TestModelParent.objects.create(name="v{}".format(i), parent_name="parent v{}".format(i))
+        # Each chunk has two parameters per parent version.
+        with patch("reversion.models._JOIN_CHUNK_SIZE", 4), self.assertNumQueries(3):
+            versions = list(Version.objects.get_for_model(TestModelParent).prefetch_field_dicts())
+        self.assertEqual(
+            [(version.field_dict["name"], version.field_dict["parent_name"]) for version in versions],
+            [("v2", "parent v2"), ("v1", "parent v1"), ("v0", "parent v0")],
+        )
+
+    def testPrefetchFieldDictsMissingParent(self):
+        with reversion.create_revision():
+            TestModelParent.objects.create()
+        Version.objects.get_for_model(TestModel).delete()
+        version = Version.objects.get_for_model(TestModelParent).prefetch_field_dicts().get()
+        with self.assertRaises(Version.DoesNotExist):
+            version.field_dict
+
 
 class M2MTest(TestModelMixin, TestBase):
 
@@ -311,6 +714,255 @@ class M2MTest(TestModelMixin, TestBase):
         self.assertEqual(set(version.field_dict["related"]), set((v1.pk, v2.pk,)))
 
 
+class ReversionFormatTest(TestBase):
+
+    def testReversionFormatDumpData(self):
+        with self.assertRaises(CommandError):
+            self.callCommand("dumpdata", "test_app", format="reversion")
+
+    def testReversionFormatFieldDict(self):
+        reversion.register(TestModel, format="reversion")
+        obj_related = TestModelRelated.objects.create()
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+            obj.related.add(obj_related)
+        self.assertEqual(Version.objects.get_for_object(obj).get().field_dict, {
+            "id": obj.pk,
+            "name": "v1",
+            "related": [obj_related.pk],
+        })
+
+    def testReversionFormatMatchesJson(self):
+        obj_related = TestModelRelated.objects.create()
+        obj = TestModelParent.objects.create()
+        obj.related.add(obj_related)
+        self.assertEqual(
+            json.loads(serializers.serialize("reversion", (obj,))),
+            json.loads(serializers.serialize("json", (obj,))),
+        )
+
+    def createWide(self):
+        obj_related = TestModelRelated.objects.create()
+        obj = TestModelWide.objects.create(
+            date=date(2020, 1, 2),
+            date_time=timezone.now().replace(microsecond=123000),
+            time=time(3, 4, 5, 6000),
+            duration=timedelta(days=1, seconds=2),
+            uuid=uuid.uuid4(),
+            ip_address="::1",
+            binary=b"\x00\xff",
+            test_model_related=obj_related,
+        )
+        obj.related.add(obj_related)
+        return TestModelWide.objects.get(pk=obj.pk)
+
+    def testReversionFormatMatchesJsonWide(self):
+        obj = self.createWide()
+        self.assertEqual(
+            json.loads(serializers.serialize("reversion", (obj,))),
+            json.loads(serializers.serialize("json", (obj,))),
+        )
+
+    def testReversionFormatRevertWide(self):
+        reversion.register(TestModelWide, format="reversion")
+        obj = self.createWide()
+        with reversion.create_revision():
+            obj.save()
+        field_dict = Version.objects.get_for_object(obj).get().field_dict
+        reversion.unregister(TestModelWide)
+        reversion.register(TestModelWide)
+        with reversion.create_revision():
+            obj.save()
+        self.assertEqual(field_dict, Version.objects.get_for_object(obj)[0].field_dict)
+        TestModelWide.objects.filter(pk=obj.pk).update(name="v2", integer=2, date=None, uuid=None, binary=None)
+        Version.objects.get_for_object(obj)[1].revert()
+        reverted_obj = TestModelWide.objects.get(pk=obj.pk)
+        for field in TestModelWide._meta.concrete_fields:
+            self.assertEqual(field.value_from_object(reverted_obj), field.value_from_object(obj))
+
+    def testReversionFormatFields(self):
+        reversion.register(TestModel, format="reversion", fields=("name",))
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        self.assertEqual(Version.objects.get_for_object(obj).get().field_dict, {
+            "name": "v1",
+        })
+
+    def testReversionFormatRevert(self):
+        reversion.register(TestModel, format="reversion")
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.name = "v2"
+            obj.save()
+        Version.objects.get_for_object(obj)[1].revert()
+        obj.refresh_from_db()
+        self.assertEqual(obj.name, "v1")
+
+
+class CompressionTest(TestBase):
+
+    def testCompression(self):
+        reversion.register(TestModel, compression="zlib")
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        version = Version.objects.get_for_object(obj).get()
+        self.assertEqual(version.compression, "zlib")
+        self.assertEqual(version.field_dict, {
+            "id": obj.pk,
+            "name": "v1",
+            "related": [],
+        })
+
+    def testCompressionCodec(self):
+        reversion.register(TestModel, compression=ZlibCodec(level=9))
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        version = Version.objects.get_for_object(obj).get()
+        self.assertEqual(version.compression, "zlib")
+        self.assertEqual(version.field_dict["name"], "v1")
+
+    def testCompressionContentHash(self):
+        reversion.register(TestModel, compression="zlib")
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        version = Version.objects.get_for_object(obj).get()
+        self.assertEqual(version.content_hash, _get_content_hash(serializers.serialize(
+            "json",
+            (obj,),
+            fields=reversion.revisions._get_options(TestModel).fields,
+        )))
+
+    def testCompressionRevert(self):
+        reversion.register(TestModel, compression="zlib")
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.name = "v2"
+            obj.save()
+        Version.objects.get_for_object(obj)[1].revert()
+        obj.refresh_from_db()
+        self.assertEqual(obj.name, "v1")
+
+    def testCompressionUnknown(self):
+        with self.assertRaises(reversion.RegistrationError):
+            reversion.register(TestModel, compression="foo")
+
+    def testCompressionUnknownCodec(self):
+        codec = ZlibCodec()
+        codec.name = "foo"
+        with self.assertRaises(reversion.RegistrationError):
+            reversion.register(TestModel, compression=codec)
+
+    def testCompressionUnknownRevert(self):
+        reversion.register(TestModel, compression="zlib")
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        Version.objects.update(compression="foo")
+        with self.assertRaises(reversion.RevertError):
+            Version.objects.get_for_object(obj).get().revert()
+
+
+class KeyframeTest(TestBase):
+
+    def createVersions(self, names, **kwargs):
+        reversion.register(TestModel, **kwargs)
+        with reversion.create_revision():
+            obj = TestModel.objects.create(name=names[0])
+        for name in names[1:]:
+            with reversion.create_revision():
+                obj.name = name
+                obj.save()
+        return obj, list(Version.objects.get_for_object(obj).order_by("pk"))
+
+    def testKeyframe(self):
+        obj, versions = self.createVersions(("v1", "v2", "v3", "v4", "v5"), keyframe_interval=2)
+        self.assertEqual([version.keyframe_id is None for version in versions], [True, False, True, False, True])
+        self.assertEqual(versions[1].keyframe, versions[0])
+        self.assertEqual([version.field_dict["name"] for version in versions], ["v1", "v2", "v3", "v4", "v5"])
+
+    def testKeyframeDelta(self):
+        obj, versions = self.createVersions(("v1", "v2"), keyframe_interval=10)
+        self.assertEqual(json.loads(versions[1].serialized_data)[0]["fields"], {"name": "v2"})
+        self.assertEqual(
+            json.loads(versions[1]._get_serialized_data()),
+            json.loads(serializers.serialize("json", (obj,))),
+        )
+
+    def testKeyframeCompression(self):
+        obj, versions = self.createVersions(("v1", "v2"), keyframe_interval=10, compression="zlib")
+        self.assertEqual(versions[1].compression, "zlib")
+        self.assertEqual(versions[1].keyframe, versions[0])
+        self.assertEqual(versions[1].field_dict["name"], "v2")
+
+    def testKeyframeRevert(self):
+        obj, versions = self.createVersions(("v1", "v2", "v3"), keyframe_interval=10)
+        versions[1].revert()
+        obj.refresh_from_db()
+        self.assertEqual(obj.name, "v2")
+
+    def testKeyframeGetUnique(self):
+        obj, versions = self.createVersions(("v1", "v2", "v2"), keyframe_interval=10)
+        self.assertEqual(len(list(Version.objects.get_for_object(obj).get_unique())), 2)
+
+    def testKeyframeDeleteKeyframe(self):
+        obj, versions = self.createVersions(("v1", "v2", "v3"), keyframe_interval=10)
+        versions[0].revision.delete()
+        versions = list(Version.objects.get_for_object(obj).order_by("pk"))
+        self.assertEqual([version.keyframe_id for version in versions], [None, None])
+        self.assertEqual([version.field_dict["name"] for version in versions], ["v2", "v3"])
+
+    def testKeyframeFormat(self):
+        with self.assertRaises(reversion.RegistrationError):
+            reversion.register(TestModel, format="xml", keyframe_interval=10)
+
+
+class BlobStorageTest(TestBase):
+
+    def testBlobStorage(self):
+        reversion.register(TestModel, blob_storage=True)
+        obj = TestModel.objects.create()
+        for _ in range(2):
+            with reversion.create_revision():
+                obj.save()
+        versions = list(Version.objects.get_for_object(obj))
+        self.assertEqual(VersionBlob.objects.count(), 1)
+        self.assertEqual([version.blob_id for version in versions], [VersionBlob.objects.get().pk] * 2)
+        self.assertEqual([version.serialized_data for version in versions], ["", ""])
+        self.assertEqual(versions[0].field_dict, {
+            "id": obj.pk,
+            "name": "v1",
+            "related": [],
+        })
+
+    def testBlobStorageKeyframeCompression(self):
+        reversion.register(TestModel, blob_storage=True, keyframe_interval=10, compression="zlib")
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.name = "v2"
+            obj.save()
+        versions = list(Version.objects.get_for_object(obj).order_by("pk"))
+        self.assertEqual(versions[1].keyframe, versions[0])
+        self.assertEqual([version.field_dict["name"] for version in versions], ["v1", "v2"])
+        # Deleting the keyframe stores the delta as a full version.
+        versions[0].revision.delete()
+        version = Version.objects.get_for_object(obj).get()
+        self.assertEqual(version.blob_id, None)
+        self.assertEqual(version.field_dict["name"], "v2")
+
+    def testBlobStorageRevert(self):
+        reversion.register(TestModel, blob_storage=True)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        with reversion.create_revision():
+            obj.name = "v2"
+            obj.save()
+        Version.objects.get_for_object(obj)[1].revert()
+        obj.refresh_from_db()
+        self.assertEqual(obj.name, "v1")
+
+
 class RevertTest(TestModelMixin, TestBase):
 
     def testRevert(self):
@@ -360,6 +1012,151 @@ class RevisionRevertTest(TestModelMixin, TestBase):
         self.assertEqual(obj_2.name, "obj_2 v1")
 
 
+class RevisionRevertOrderTest(TestBase):
+
+    def testSortModels(self):
+        self.assertEqual(
+            _sort_models([TestModelNestedInline, TestModelParent, TestModelInline, TestModelRelated, TestModel]),
+            [TestModelRelated, TestModel, TestModelParent, TestModelInline, TestModelNestedInline],
+        )
+
+    def testSortModelsProxy(self):
+        self.assertEqual(
+            _sort_models([TestModelInlineProxy, TestModelProxy]),
+            [TestModelProxy, TestModelInlineProxy],
+        )
+
+    def testRevertOrderProxy(self):
+        reversion.register(TestModelProxy, for_concrete_model=False)
+        reversion.register(TestModelInlineProxy, for_concrete_model=False)
+        with reversion.create_revision():
+            obj_inline = TestModelInlineProxy.objects.create(test_model=TestModelProxy.objects.create())
+        revision = Version.objects.get_for_object(obj_inline).get().revision
+        with patch.object(Version, "revert", autospec=True, side_effect=Version.revert) as revert:
+            revision.revert()
+        self.assertEqual([call[0][0]._model for call in revert.call_args_list], [
+            TestModelProxy,
+            TestModelInlineProxy,
+        ])
+
+    def testRevertOrder(self):
+        reversion.register(TestModel, follow=("testmodelinline_set",))
+        reversion.register(TestModelInline, follow=("testmodelnestedinline_set",))
+        reversion.register(TestModelNestedInline)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+            obj_inline = TestModelInline.objects.create(test_model=obj)
+            TestModelNestedInline.objects.create(test_model_inline=obj_inline)
+            reversion.add_to_revision(obj)
+        revision = Version.objects.get_for_object(obj).get().revision
+        with patch.object(Version, "revert", autospec=True, side_effect=Version.revert) as revert:
+            revision.revert()
+        self.assertEqual([call[0][0]._model for call in revert.call_args_list], [
+            TestModel,
+            TestModelInline,
+            TestModelNestedInline,
+        ])
+
+
+class RevisionRevertBulkTest(TestBase):
+
+    def testRevertBulk(self):
+        reversion.register(TestModel)
+        with reversion.create_revision():
+            obj_1 = TestModel.objects.create(name="obj_1 v1")
+            obj_2 = TestModel.objects.create(name="obj_2 v1")
+        with reversion.create_revision():
+            obj_1.name = "obj_1 v2"
+            obj_1.save()
+        pk_2 = obj_2.pk
+        obj_2.delete()
+        Version.objects.get_for_object(obj_1)[1].revision.revert(bulk=True)
+        obj_1.refresh_from_db()
+        self.assertEqual(obj_1.name, "obj_1 v1")
+        self.assertEqual(TestModel.objects.get(pk=pk_2).name, "obj_2 v1")
+
+    def testRevertBulkM2M(self):
+        reversion.register(TestModel)
+        obj_related_1 = TestModelRelated.objects.create()
+        obj_related_2 = TestModelRelated.objects.create()
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+            obj.related.add(obj_related_1)
+        obj.related.set([obj_related_2])
+        Version.objects.get_for_object(obj).get().revision.revert(bulk=True)
+        self.assertEqual(list(obj.related.all()), [obj_related_1])
+
+    def testRevertBulkM2MSymmetrical(self):
+        reversion.register(TestModelSymmetrical)
+        obj_1 = TestModelSymmetrical.objects.create()
+        obj_2 = TestModelSymmetrical.objects.create()
+        with reversion.create_revision():
+            obj = TestModelSymmetrical.objects.create()
+            obj.related.add(obj_1)
+        obj.related.set([obj_2])
+        Version.objects.get_for_object(obj).get().revision.revert(bulk=True)
+        self.assertEqual(list(obj.related.all()), [obj_1])
+        self.assertEqual(list(obj_1.related.all()), [obj])
+        self.assertEqual(list(obj_2.related.all()), [])
+        self.assertEqual(TestModelSymmetrical.related.through.objects.count(), 2)
+
+    def testRevertBulkInheritance(self):
+        reversion.register(TestModel)
+        reversion.register(TestModelParent, follow=("testmodel_ptr",))
+        with reversion.create_revision():
+            obj = TestModelParent.objects.create()
+        obj.name = "v2"
+        obj.parent_name = "parent v2"
+        obj.save()
+        Version.objects.get_for_object(obj).get().revision.revert(bulk=True)
+        obj.refresh_from_db()
+        self.assertEqual(obj.name, "v1")
+        self.assertEqual(obj.parent_name, "parent v1")
+
+    def testRevertBulkProxy(self):
+        reversion.register(TestModelProxy, for_concrete_model=False)
+        with reversion.create_revision():
+            obj = TestModelProxy.objects.create()
+        obj.name = "v2"
+        obj.save()
+        Version.objects.get_for_object(obj).get().revision.revert(bulk=True)
+        obj.refresh_from_db()
+        self.assertEqual(obj.name, "v1")
+
+    def testHasUniqueConstraints(self):
+        self.assertFalse(_has_unique_constraints(TestModel))
+        self.assertFalse(_has_unique_constraints(TestModelParent))
+        self.assertFalse(_has_unique_constraints(TestModelEscapePK))
+        self.assertTrue(_has_unique_constraints(Version))
+
+    def testRevertBulkMySQLUniqueConstraints(self):
+        reversion.register(TestModel)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        obj.name = "v2"
+        obj.save()
+        revision = Version.objects.get_for_object(obj).get().revision
+        with patch.object(connection, "vendor", "mysql"), \
+                patch("reversion.models._has_unique_constraints", return_value=True), \
+                patch.object(Version, "revert", autospec=True, side_effect=Version.revert) as revert:
+            revision.revert(bulk=True)
+        self.assertEqual(revert.call_count, 1)
+        obj.refresh_from_db()
+        self.assertEqual(obj.name, "v1")
+
+    def testRevertBulkDependency(self):
+        reversion.register(TestModel, follow=("testmodelinline_set",))
+        reversion.register(TestModelInline)
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+            obj_inline = TestModelInline.objects.create(test_model=obj)
+        revision = Version.objects.get_for_object(obj).get().revision
+        pk = obj.pk
+        obj.delete()
+        revision.revert(bulk=True)
+        self.assertTrue(TestModelInline.objects.filter(pk=obj_inline.pk, test_model=pk).exists())
+
+
 class RevisionRevertDeleteTest(TestBase):
 
     def testRevertDelete(self):
@@ -413,3 +1210,64 @@ class RevisionRevertDeleteTest(TestBase):
         self.assertEqual(
             list(child_a.testmodelnestedinline_set.all()), [grandchild_a]
         )
+
+
+class VersionCacheTest(TestModelMixin, TestBase):
+
+    def setUp(self):
+        super(VersionCacheTest, self).setUp()
+        reversion.configure_version_cache(max_size=1024 * 1024)
+
+    def tearDown(self):
+        super(VersionCacheTest, self).tearDown()
+        reversion.configure_version_cache(None)
+
+    def testVersionCache(self):
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        self.assertEqual(Version.objects.get_for_object(obj).get().field_dict["name"], "v1")
+        self.assertEqual(Version.objects.get_for_object(obj).get().field_dict["name"], "v1")
+        stats = reversion.get_version_cache_stats()
+        self.assertEqual(stats.hits, 1)
+        self.assertEqual(stats.misses, 1)
+        self.assertGreater(stats.size, 0)
+
+    def testVersionCacheCopies(self):
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        version = Version.objects.get_for_object(obj).get()
+        version.field_dict["name"] = "v2"
+        version._object_version.object.name = "v2"
+        version = Version.objects.get_for_object(obj).get()
+        self.assertEqual(version.field_dict["name"], "v1")
+        self.assertEqual(version._object_version.object.name, "v1")
+
+    def testVersionCacheRevert(self):
+        with reversion.create_revision():
+            obj = TestModel.objects.create()
+        version = Version.objects.get_for_object(obj).get()
+        self.assertEqual(version.field_dict["name"], "v1")
+        obj.name = "v2"
+        obj.save()
+        Version.objects.get_for_object(obj).get().revert()
+        obj.refresh_from_db()
+        self.assertEqual(obj.name, "v1")
+
+    def testVersionCacheEviction(self):
+        with reversion.create_revision():
+            obj_1 = TestModel.objects.create()
+        with reversion.create_revision():
+            obj_2 = TestModel.objects.create()
+        version_1 = Version.objects.get_for_object(obj_1).get()
+        reversion.configure_version_cache(max_size=len(version_1.serialized_data))
+        self.assertEqual(version_1.field_dict["name"], "v1")
+        self.assertEqual(Version.objects.get_for_object(obj_2).get().field_dict["name"], "v1")
+        self.assertEqual(Version.objects.get_for_object(obj_1).get().field_dict["name"], "v1")
+        stats = reversion.get_version_cache_stats()
+        self.assertEqual(stats.hits, 0)
+        self.assertEqual(stats.misses, 3)
+        self.assertEqual(stats.evictions, 2)
+
+    def testVersionCacheDisabled(self):
+        reversion.configure_version_cache(None)
+        self.assertIsNone(reversion.get_version_cache_stats())
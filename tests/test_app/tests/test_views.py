@@ -1,5 +1,29 @@
+from unittest import skipIf
+from django.test import RequestFactory
+from django.views.generic.base import View
+from reversion.revisions import iscoroutinefunction
+from reversion.views import create_revision, RevisionMixin
 from test_app.models import TestModel
 from test_app.tests.base import TestBase, TestModelMixin, LoginMixin
+from test_app.views import save_obj_view, save_obj_bad_request_view
+
+try:
+    from asgiref.sync import async_to_sync, sync_to_async
+except ImportError:  # pragma: no cover
+    async_to_sync = sync_to_async = None
+try:
+    from django.test import AsyncClient
+except ImportError:  # Django < 3.1
+    AsyncClient = None
+
+
+class RevisionMixinAsyncView(RevisionMixin, View):
+
+    # Async class-based views have a sync dispatch() method that returns a coroutine.
+    view_is_async = True
+
+    def dispatch(self, request):
+        return sync_to_async(save_obj_view)(request)
 
 
 class CreateRevisionTest(TestModelMixin, TestBase):
@@ -14,6 +38,43 @@ class CreateRevisionTest(TestModelMixin, TestBase):
         self.assertNoRevision()
 
 
+@skipIf(async_to_sync is None, "asgiref is not installed")
+class CreateRevisionAsyncViewTest(TestModelMixin, TestBase):
+
+    def testCreateRevisionAsyncView(self):
+        view = create_revision()(sync_to_async(save_obj_view))
+        response = async_to_sync(view)(RequestFactory().post("/"))
+        obj = TestModel.objects.get(pk=response.content)
+        self.assertSingleRevision((obj,))
+
+    def testCreateRevisionAsyncViewGet(self):
+        view = create_revision()(sync_to_async(save_obj_view))
+        async_to_sync(view)(RequestFactory().get("/"))
+        self.assertNoRevision()
+
+    def testCreateRevisionAsyncViewErrorResponse(self):
+        view = create_revision()(sync_to_async(save_obj_bad_request_view))
+        response = async_to_sync(view)(RequestFactory().post("/"))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(TestModel.objects.exists())
+        self.assertNoRevision()
+
+
+@skipIf(AsyncClient is None, "Django < 3.1 does not support async views")
+class CreateRevisionAsyncClientTest(TestModelMixin, TestBase):
+
+    def testCreateRevisionAsyncView(self):
+        from test_app.async_views import create_revision_async_view
+        self.assertTrue(iscoroutinefunction(create_revision_async_view))
+        response = async_to_sync(AsyncClient().post)("/test-app/create-revision-async/")
+        obj = TestModel.objects.get(pk=response.content)
+        self.assertSingleRevision((obj,))
+
+    def testCreateRevisionAsyncViewGet(self):
+        async_to_sync(AsyncClient().get)("/test-app/create-revision-async/")
+        self.assertNoRevision()
+
+
 class CreateRevisionUserTest(LoginMixin, TestModelMixin, TestBase):
 
     def testCreateRevisionUser(self):
@@ -38,6 +99,22 @@ class RevisionMixinTest(TestModelMixin, TestBase):
         self.assertNoRevision()
 
 
+@skipIf(async_to_sync is None, "asgiref is not installed")
+class RevisionMixinAsyncTest(TestModelMixin, TestBase):
+
+    def testRevisionMixinAsync(self):
+        view = RevisionMixinAsyncView()
+        self.assertTrue(iscoroutinefunction(view.dispatch))
+        response = async_to_sync(view.dispatch)(RequestFactory().post("/"))
+        obj = TestModel.objects.get(pk=response.content)
+        self.assertSingleRevision((obj,))
+
+    def testRevisionMixinAsyncGet(self):
+        view = RevisionMixinAsyncView()
+        async_to_sync(view.dispatch)(RequestFactory().get("/"))
+        self.assertNoRevision()
+
+
 class RevisionMixinUserTest(LoginMixin, TestModelMixin, TestBase):
 
     def testCreateRevisionUser(self):
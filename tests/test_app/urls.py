@@ -1,3 +1,4 @@
+import django
 from django.conf.urls import url
 from test_app import views
 
@@ -8,3 +9,11 @@ urlpatterns = [
     url("^create-revision/", views.create_revision_view),
     url("^revision-mixin/", views.RevisionMixinView.as_view()),
 ]
+
+# Django >= 3.1 supports async views.
+if django.VERSION >= (3, 1):
+    from test_app import async_views
+    urlpatterns += [
+        url("^save-obj-async/", async_views.save_obj_async_view),
+        url("^create-revision-async/", async_views.create_revision_async_view),
+    ]
@@ -1,4 +1,4 @@
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest
 from django.views.generic.base import View
 from reversion.views import create_revision, RevisionMixin
 from test_app.models import TestModel
@@ -13,6 +13,11 @@ def save_obj_error_view(request):
     raise Exception("Boom!")
 
 
+def save_obj_bad_request_view(request):
+    TestModel.objects.create()
+    return HttpResponseBadRequest()
+
+
 @create_revision()
 def create_revision_view(request):
     return save_obj_view(request)